@@ -1,24 +1,81 @@
+import os
 import time
+import json
+import importlib.util
+import threading
+import asyncio
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import numpy as np
 
-<<<<<<< Updated upstream
-from stocks import get_stock_list, fetch_stock_data, calculate_returns_and_cov, NIFTY_50
-from qaoa import optimize_qaoa, classical_brute_force
-=======
-from stocks import get_stock_list, fetch_stock_data, calculate_returns_and_cov
-from qaoa import optimize_qaoa, classical_brute_force
+from stocks import (get_stock_list, fetch_stock_data, generate_mock_data, load_closes, align_prices, price_frame,
+                    calculate_returns_and_cov, NIFTY_50)
+from math import comb
+from qaoa import OPTIMIZERS, PRECISIONS, QAOA_MODES, MIXERS, optimize_qaoa, classical_brute_force, classical_branch_and_bound, classical_heuristic
+from price_cache import price_cache
+from classical import BRUTE_FORCE_LIMIT
+from frontier import FRONTIER_SOLVERS, lambda_grid, solve_frontier
+from backtest import backtest_portfolio
+from warmstart import angle_store
+from memo import cached_returns_and_cov, returns_key, cached_qubo, cached_qubo_parts, cache_stats as memo_stats
+from jobs import job_manager, JobQueueFull
+from tracing import PROFILERS, Trace, metrics
+from risk import RISK_MODELS, risk_models
+from warmup import readiness
 
->>>>>>> Stashed changes
+MAX_STOCKS = 50
+MAX_QUBITS = 20
+MAX_CHUNKED_QUBITS = 30
+BNB_TIME_LIMIT = 30.0
+MAX_STARTS = 16
+MAX_FRONTIER_POINTS = 51
+MAX_REBALANCES = 120
+MAX_TOP_PORTFOLIOS = 20
+MAX_BATCH_SCENARIOS = 500
+BATCH_WORKERS = int(os.environ.get('QPO_BATCH_WORKERS', os.cpu_count() or 1))
+WARM_RISK_MODELS = [m for m in os.environ.get('QPO_WARM_RISK_MODELS', '').split(',') if m]
+SSE_POLL_INTERVAL = 0.25
+SSE_KEEPALIVE = 15.0
 
-app = FastAPI(title="Quantum Portfolio Optimizer")
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARM_RISK_MODELS:
+        # Fit the universe-wide risk models in the background so startup is not held up by the price load
+        threading.Thread(target=risk_models.warm, args=(WARM_RISK_MODELS,), daemon=True).start()
+    # Heavy imports on this (main) thread, the rest of the warm-up in the background; /ready answers 503 until done
+    readiness.load()
+    threading.Thread(target=readiness.run, args=(job_manager,), daemon=True).start()
+    yield
+    job_manager.shutdown()
+
+
+app = FastAPI(title="Quantum Portfolio Optimizer", lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/api/jobs/{job_id}) so ids do not explode the series count
+        route = request.scope.get('route')
+        metrics.observe_request(request.method, getattr(route, 'path', 'unmatched'), status,
+                                time.perf_counter() - start)
+
+
 class OptimizeRequest(BaseModel):
     stocks: List[str]
     k: int
@@ -28,11 +85,73 @@ class OptimizeRequest(BaseModel):
     shots: int = 1024
     sector_diversify: bool = False
     max_per_sector: int = 1
+    qaoa_mode: str = "exact"
+    mixer: str = "x"
+    classical_solver: str = "auto"
+    heuristic: str = "simulated_annealing"
+    warm_start: bool = True
+    optimizer: str = "cobyla"
+    starts: int = 1
+    time_budget: Optional[float] = None
+    plateau: Optional[int] = None
+    profile: Optional[str] = None
+    top_portfolios: int = 5
+    risk_model: str = "sample"
+    precision: str = "complex128"
+
+
+class FrontierRequest(BaseModel):
+    stocks: List[str]
+    k: int
+    lambdas: Optional[List[float]] = None
+    lambda_min: float = 0.0
+    lambda_max: float = 1.0
+    lambda_steps: int = 11
+    solver: str = "exact"
+    sector_diversify: bool = False
+    max_per_sector: int = 1
+    p: int = 1
+    maxiter: int = 50
+    shots: int = 1024
+    qaoa_mode: str = "exact"
+    mixer: str = "x"
+    risk_model: str = "sample"
+
+
+class BatchRequest(BaseModel):
+    scenarios: List[OptimizeRequest]
+    workers: Optional[int] = None
+
+
+class BacktestRequest(BaseModel):
+    stocks: List[str]
+    k: int
+    lambda_param: float = 0.5
+    period: str = "2y"
+    window: int = 126
+    rebalance_every: int = 21
+    solver: str = "exact"
+    sector_diversify: bool = False
+    max_per_sector: int = 1
+    mock_data: bool = False
+    p: int = 1
+    maxiter: int = 50
+    shots: int = 1024
+    qaoa_mode: str = "exact"
+    mixer: str = "x"
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "version": "2.0", "quantum_ready": True}
+    """Liveness: always 200 while the process serves, with the warm-up state for information."""
+    return {"status": "ok", "version": "2.0", **readiness.report()}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once startup warm-up has finished, 503 before, so load balancers skip cold workers."""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report['ready'] else 503)
 
 
 @app.get("/api/stocks")
@@ -41,6 +160,28 @@ def get_stocks():
     return {"stocks": stocks, "count": len(stocks)}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: request and stage latency histograms, pipeline event counters."""
+    return metrics.render()
+
+
+@app.get("/api/cache")
+def cache_stats():
+    return {"prices": price_cache.stats(), **memo_stats(), "angles": angle_store.stats(), "risk_models": risk_models.stats()}
+
+
+class OptimizationError(Exception):
+    """A request that cannot be optimized; carries the HTTP status to report."""
+
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail, status_code)
+        self.detail, self.status_code = detail, status_code
+
+    def __str__(self):
+        return self.detail
+
+
 def compute_portfolio_metrics(returns, covariance, selected_indices):
     """Compute return, risk, sharpe for a set of selected stock indices."""
     n_sel = len(selected_indices)
@@ -53,185 +194,554 @@ def compute_portfolio_metrics(returns, covariance, selected_indices):
     return float(port_return), float(port_risk), float(sharpe)
 
 
-@app.post("/api/optimize")
-def optimize_portfolio(request: OptimizeRequest):
+def validate_request(request):
+    n = len(request.stocks)
+    if n > MAX_STOCKS:
+        raise OptimizationError(f"Too many stocks ({n}). Max {MAX_STOCKS}.")
+    if request.k < 1:
+        raise OptimizationError(f"k ({request.k}) must be at least 1")
+    if request.k > n:
+        raise OptimizationError(f"k ({request.k}) cannot exceed number of stocks ({n})")
+    if request.classical_solver not in ('auto', 'brute_force', 'branch_and_bound'):
+        raise OptimizationError(f"Unknown classical_solver '{request.classical_solver}'")
+    if request.heuristic not in ('simulated_annealing', 'tabu'):
+        raise OptimizationError(f"Unknown heuristic '{request.heuristic}'")
+    if request.optimizer not in OPTIMIZERS:
+        raise OptimizationError(f"Unknown optimizer '{request.optimizer}'. Use one of: {', '.join(OPTIMIZERS)}")
+    if request.optimizer == 'l-bfgs-b' and request.qaoa_mode != 'exact':
+        raise OptimizationError("optimizer 'l-bfgs-b' needs qaoa_mode='exact'")
+    if not 1 <= request.starts <= MAX_STARTS:
+        raise OptimizationError(f"starts must be between 1 and {MAX_STARTS}")
+    if request.risk_model not in RISK_MODELS:
+        raise OptimizationError(f"Unknown risk_model '{request.risk_model}'. Use one of: {', '.join(RISK_MODELS)}")
+    if request.precision not in PRECISIONS:
+        raise OptimizationError(f"Unknown precision '{request.precision}'. Use one of: {', '.join(PRECISIONS)}")
+    if not 1 <= request.top_portfolios <= MAX_TOP_PORTFOLIOS:
+        raise OptimizationError(f"top_portfolios must be between 1 and {MAX_TOP_PORTFOLIOS}")
+    if request.profile is not None and request.profile not in PROFILERS:
+        raise OptimizationError(f"Unknown profile '{request.profile}'. Use one of: {', '.join(PROFILERS)}")
+    if request.profile == 'pyinstrument' and importlib.util.find_spec('pyinstrument') is None:
+        raise OptimizationError("profile 'pyinstrument' needs the pyinstrument package installed")
+    validate_qaoa_size(n, request.k, request.qaoa_mode, request.mixer)
+
+
+def validate_qaoa_size(n, k, mode, mixer):
+    if mode not in QAOA_MODES:
+        raise OptimizationError(f"Unknown qaoa_mode '{mode}'. Use one of: {', '.join(QAOA_MODES)}")
+    if mixer not in MIXERS:
+        raise OptimizationError(f"Unknown mixer '{mixer}'. Use one of: {', '.join(MIXERS)}")
+    # Beyond MAX_QUBITS only the exact XY-ring simulation over the C(n, k) feasible states
+    # or the chunked x-mixer simulation (up to MAX_CHUNKED_QUBITS) is tractable
+    if mode == 'chunked':
+        if mixer != 'x':
+            raise OptimizationError("qaoa_mode='chunked' supports mixer='x' only")
+        if n > MAX_CHUNKED_QUBITS:
+            raise OptimizationError(f"Too many stocks ({n}) for qaoa_mode='chunked'. Max {MAX_CHUNKED_QUBITS}.")
+        return
+    if n > MAX_QUBITS and not (mode == 'exact' and mixer == 'xy_ring' and comb(n, k) <= 2 ** MAX_QUBITS):
+        raise OptimizationError(f"Too many stocks ({n}) for quantum simulation. Max {MAX_QUBITS}, use "
+                                f"qaoa_mode='chunked' up to {MAX_CHUNKED_QUBITS}, or qaoa_mode='exact' with "
+                                f"mixer='xy_ring' while C(n, k) <= 2^{MAX_QUBITS}.")
+
+
+def sector_index_map(tickers):
+    sector_map = {}
+    for i, ticker in enumerate(tickers):
+        sector = NIFTY_50.get(ticker, {}).get('sector', 'Unknown')
+        sector_map.setdefault(sector, []).append(i)
+    return sector_map
+
+
+def fetch_problem_data(stocks, k, period='2y'):
+    """Fetch prices for a basket and check k still fits; returns (prices, stock_status)."""
+    prices, stock_status = fetch_stock_data(stocks, period)
+    check_available(prices, stocks, k)
+    return prices, stock_status
+
+
+def basket_returns_and_cov(prices, stock_status, risk_model='sample'):
+    """(returns, covariance, data_key) for a basket: the memoized sample estimate, or a slice of a universe risk model."""
+    if risk_model == 'sample':
+        return cached_returns_and_cov(prices)
+    return risk_models.basket(prices, stock_status, risk_model)
+
+
+def check_available(prices, stocks, k):
+    n_available = len(prices.columns)
+    if n_available == 0:
+        raise OptimizationError("No stock data could be fetched. Please try different stocks.", 500)
+    if k > n_available:
+        failed = [s for s in stocks if s not in prices.columns]
+        raise OptimizationError(f"k ({k}) exceeds available stocks ({n_available}). Failed: {', '.join(failed)}")
+
+
+def run_optimization(request, progress=None, problem=None):
+    """Fetch data, run both solvers and build the /api/optimize response.
+
+    `request` may be an OptimizeRequest or its dict form (as sent to job workers);
+    `progress(stage, **fields)` is forwarded to the solvers. The response's
+    `timings` has per-stage durations and counters (plus a profile on request).
+    A preloaded (prices, stock_status, returns, covariance, data_key) can be
+    passed as `problem` to skip the data fetch.
+    """
+    if isinstance(request, dict):
+        request = OptimizeRequest(**request)
+    validate_request(request)
+    with Trace(profile=request.profile) as trace:
+        response = _optimize(request, progress, problem)
+    response["timings"] = trace.report()
+    return response
+
+
+def _optimize(request, progress=None, problem=None):
     start_time = time.time()
-    try:
-        MAX_STOCKS = 20
-        if len(request.stocks) > MAX_STOCKS:
-            raise HTTPException(400, f"Too many stocks ({len(request.stocks)}). Max {MAX_STOCKS} for quantum simulation.")
-        if request.k > len(request.stocks):
-            raise HTTPException(400, f"k ({request.k}) cannot exceed number of stocks ({len(request.stocks)})")
-
-        prices, stock_status = fetch_stock_data(request.stocks)
-        n_available = len(prices.columns)
-        if n_available == 0:
-            raise HTTPException(500, "No stock data could be fetched. Please try different stocks.")
-        if request.k > n_available:
-            failed = [s for s in request.stocks if s not in prices.columns]
-            raise HTTPException(400, f"k ({request.k}) exceeds available stocks ({n_available}). Failed: {', '.join(failed)}")
-
-        returns, covariance = calculate_returns_and_cov(prices)
-<<<<<<< Updated upstream
-=======
-        
-        # --- Run Classical Brute-Force ---
-        print("Running classical brute-force solver...")
-        classical_start = time.time()
-        classical_result = classical_brute_force(
-            returns, covariance, request.k,
-            lambda_param=request.lambda_param
-        )
-        classical_time = time.time() - classical_start
-        
-        # --- Run QAOA (Quantum) ---
-        print("Running QAOA quantum solver...")
-        qaoa_start = time.time()
-        result = optimize_qaoa(
-            returns, covariance, request.k,
-            lambda_param=request.lambda_param,
-            p=request.p,
-            maxiter=request.maxiter,
-            shots=request.shots
-        )
-        qaoa_time = time.time() - qaoa_start
-        
-        # Map selected indices to actual stock tickers (prices.columns, not request.stocks)
->>>>>>> Stashed changes
-        actual_tickers = list(prices.columns)
-
-        # Build sector index mapping if enabled
-        sector_indices = None
-        if request.sector_diversify:
-            sector_map = {}
-            for i, ticker in enumerate(actual_tickers):
-                sector = NIFTY_50.get(ticker, {}).get('sector', 'Unknown')
-                sector_map.setdefault(sector, []).append(i)
-            sector_indices = sector_map
-
-        # Run Classical Brute-Force
+
+    if problem is None:
+        prices, stock_status = fetch_problem_data(request.stocks, request.k)
+        returns, covariance, data_key = basket_returns_and_cov(prices, stock_status, request.risk_model)
+    else:
+        prices, stock_status, returns, covariance, data_key = problem
+    n_available = len(prices.columns)
+    if progress is not None:
+        progress('data', tickers=n_available, days=len(prices))
+
+    actual_tickers = list(prices.columns)
+
+    # Build sector index mapping if enabled
+    sector_indices = sector_index_map(actual_tickers) if request.sector_diversify else None
+
+    # One QUBO (memoized across requests) shared by both solvers
+    qubo = cached_qubo(data_key, returns, covariance, request.k, request.lambda_param,
+                       sector_indices, request.max_per_sector)
+
+    # Run the exact classical baseline: enumeration while it is cheap, branch-and-bound beyond that
+    classical_solver = request.classical_solver
+    if classical_solver == 'auto':
+        classical_solver = 'brute_force' if comb(n_available, request.k) <= BRUTE_FORCE_LIMIT else 'branch_and_bound'
+    if classical_solver == 'brute_force':
         classical_result = classical_brute_force(returns, covariance, request.k,
-            lambda_param=request.lambda_param, sector_indices=sector_indices, max_per_sector=request.max_per_sector)
-
-        # Run QAOA
-        qaoa_start = time.time()
-        result = optimize_qaoa(returns, covariance, request.k,
-            lambda_param=request.lambda_param, p=request.p, maxiter=request.maxiter,
-            shots=request.shots, sector_indices=sector_indices, max_per_sector=request.max_per_sector)
-        qaoa_time = time.time() - qaoa_start
-
-        selected_tickers = [actual_tickers[i] for i in result['selected_indices']]
-        classical_tickers = [actual_tickers[i] for i in classical_result['selected_indices']]
-<<<<<<< Updated upstream
-
-        port_return, port_risk, sharpe = compute_portfolio_metrics(returns, covariance, result['selected_indices'])
-        c_return, c_risk, c_sharpe = compute_portfolio_metrics(returns, covariance, classical_result['selected_indices'])
-
-        results_match = set(result['selected_indices']) == set(classical_result['selected_indices'])
-
-=======
-        n_selected = len(selected_tickers)
-        weights = [1.0 / n_selected] * n_selected
-        
-        selected_returns = returns[result['selected_indices']]
-        portfolio_return = np.mean(selected_returns)
-        
-        w = np.zeros(len(returns))
-        w[result['selected_indices']] = 1.0 / n_selected
-        portfolio_variance = w @ covariance @ w
-        portfolio_risk = np.sqrt(portfolio_variance)
-        sharpe = portfolio_return / portfolio_risk if portfolio_risk > 0 else 0
-        
-        # Classical portfolio metrics
-        classical_selected_returns = returns[classical_result['selected_indices']]
-        classical_portfolio_return = np.mean(classical_selected_returns)
-        w_classical = np.zeros(len(returns))
-        n_classical = len(classical_result['selected_indices'])
-        w_classical[classical_result['selected_indices']] = 1.0 / n_classical
-        classical_portfolio_variance = w_classical @ covariance @ w_classical
-        classical_portfolio_risk = np.sqrt(classical_portfolio_variance)
-        classical_sharpe = classical_portfolio_return / classical_portfolio_risk if classical_portfolio_risk > 0 else 0
-        
-        # Check if both methods found the same solution
-        results_match = set(result['selected_indices']) == set(classical_result['selected_indices'])
-        
->>>>>>> Stashed changes
-        stock_metrics = {}
-        for i, ticker in enumerate(actual_tickers):
+            lambda_param=request.lambda_param, sector_indices=sector_indices, max_per_sector=request.max_per_sector,
+            qubo=qubo, progress=progress)
+    else:
+        classical_result = classical_branch_and_bound(returns, covariance, request.k,
+            lambda_param=request.lambda_param, sector_indices=sector_indices, max_per_sector=request.max_per_sector,
+            qubo=qubo, progress=progress, time_limit=BNB_TIME_LIMIT)
+
+    # Run the heuristic baseline
+    heuristic_result = classical_heuristic(returns, covariance, request.k,
+        lambda_param=request.lambda_param, sector_indices=sector_indices, max_per_sector=request.max_per_sector,
+        method=request.heuristic, qubo=qubo, progress=progress)
+
+    # Run QAOA
+    qaoa_start = time.time()
+    result = optimize_qaoa(returns, covariance, request.k,
+        lambda_param=request.lambda_param, p=request.p, maxiter=request.maxiter,
+        shots=request.shots, sector_indices=sector_indices, max_per_sector=request.max_per_sector,
+        mode=request.qaoa_mode, qubo=qubo, progress=progress, mixer=request.mixer,
+        warm_start=request.warm_start, optimizer=request.optimizer, starts=request.starts,
+        time_budget=request.time_budget, plateau=request.plateau, top=request.top_portfolios,
+        precision=request.precision)
+    qaoa_time = time.time() - qaoa_start
+
+    selected_tickers = [actual_tickers[i] for i in result['selected_indices']]
+    classical_tickers = [actual_tickers[i] for i in classical_result['selected_indices']]
+
+    port_return, port_risk, sharpe = compute_portfolio_metrics(returns, covariance, result['selected_indices'])
+    c_return, c_risk, c_sharpe = compute_portfolio_metrics(returns, covariance, classical_result['selected_indices'])
+    heuristic_tickers = [actual_tickers[i] for i in heuristic_result['selected_indices']]
+    h_return, h_risk, h_sharpe = compute_portfolio_metrics(returns, covariance, heuristic_result['selected_indices'])
+
+    results_match = set(result['selected_indices']) == set(classical_result['selected_indices'])
+
+    stock_metrics = {}
+    for i, ticker in enumerate(actual_tickers):
+        stock_metrics[ticker] = {
+            "expected_return": float(returns[i]),
+            "volatility": float(np.sqrt(covariance[i, i])),
+            "selected": ticker in selected_tickers,
+            "sector": NIFTY_50.get(ticker, {}).get('sector', 'Unknown'),
+            "status": stock_status.get(ticker, 'unknown')
+        }
+    for ticker in request.stocks:
+        if ticker not in stock_metrics:
             stock_metrics[ticker] = {
-                "expected_return": float(returns[i]),
-                "volatility": float(np.sqrt(covariance[i, i])),
-                "selected": ticker in selected_tickers,
+                "expected_return": None, "volatility": None, "selected": False,
                 "sector": NIFTY_50.get(ticker, {}).get('sector', 'Unknown'),
-                "status": stock_status.get(ticker, 'unknown')
+                "status": stock_status.get(ticker, 'data_unavailable')
             }
-        for ticker in request.stocks:
-            if ticker not in stock_metrics:
-                stock_metrics[ticker] = {
-                    "expected_return": None, "volatility": None, "selected": False,
-                    "sector": NIFTY_50.get(ticker, {}).get('sector', 'Unknown'),
-                    "status": stock_status.get(ticker, 'data_unavailable')
-                }
-
-        return {
-            "success": True,
-            "portfolio": {
-                "selected_stocks": selected_tickers, "num_selected": len(selected_tickers),
-                "expected_return": port_return, "portfolio_risk": port_risk, "sharpe_ratio": sharpe,
-            },
-            "qaoa_metrics": {
-                "num_qubits": result['num_qubits'], "circuit_depth": result['qaoa_layers'] * 4,
-                "qaoa_layers": result['qaoa_layers'], "iterations": result['iterations'],
-                "optimal_cost": result['optimal_cost']
+
+    return {
+        "success": True,
+        "portfolio": {
+            "selected_stocks": selected_tickers, "num_selected": len(selected_tickers),
+            "expected_return": port_return, "portfolio_risk": port_risk, "sharpe_ratio": sharpe,
+        },
+        "qaoa_metrics": {
+            "num_qubits": result['num_qubits'], "circuit_depth": result['qaoa_layers'] * 4,
+            "qaoa_layers": result['qaoa_layers'], "iterations": result['iterations'],
+            "optimal_cost": result['optimal_cost'], "mode": request.qaoa_mode,
+            "mixer": result['mixer'], "state_dimension": result['state_dimension'],
+            "stopped_early": result['stopped_early'], "warm_start": result['warm_start'],
+            "iterations_saved": result['iterations_saved'], "optimizer": result['optimizer'],
+            "starts": result['starts'], "total_evaluations": result['total_evaluations'],
+            "stop_reason": result['stop_reason'], "precision": request.precision
+        },
+        "comparison": {
+            "classical": {
+                "selected_stocks": classical_tickers, "optimal_cost": classical_result['optimal_cost'],
+                "expected_return": c_return, "portfolio_risk": c_risk, "sharpe_ratio": c_sharpe,
+                "computation_time": round(classical_result['computation_time'], 4),
+                "solver": classical_solver,
+                "total_combinations": classical_result['total_combinations'],
+                "combinations_evaluated": classical_result['total_combinations'] if classical_solver == 'brute_force' else None,
+                "combinations_per_second": classical_result.get('combinations_per_second'),
+                "nodes_explored": classical_result.get('nodes_explored'),
+                "proven_optimal": classical_result.get('proven_optimal', True)
             },
-            "comparison": {
-                "classical": {
-<<<<<<< Updated upstream
-                    "selected_stocks": classical_tickers, "optimal_cost": classical_result['optimal_cost'],
-                    "expected_return": c_return, "portfolio_risk": c_risk, "sharpe_ratio": c_sharpe,
-                    "computation_time": round(classical_result['computation_time'], 4),
-                    "combinations_evaluated": classical_result['total_combinations']
-                },
-                "qaoa": {
-                    "selected_stocks": selected_tickers, "optimal_cost": result['optimal_cost'],
-                    "expected_return": port_return, "portfolio_risk": port_risk, "sharpe_ratio": sharpe,
-                    "computation_time": round(qaoa_time, 4), "qaoa_iterations": result['iterations']
-                },
-                "results_match": results_match
+            "heuristic": {
+                "selected_stocks": heuristic_tickers, "optimal_cost": heuristic_result['optimal_cost'],
+                "expected_return": h_return, "portfolio_risk": h_risk, "sharpe_ratio": h_sharpe,
+                "computation_time": round(heuristic_result['computation_time'], 4),
+                "method": heuristic_result['method'], "restarts": heuristic_result['restarts'],
+                "moves_evaluated": heuristic_result['moves_evaluated'],
+                "moves_per_second": heuristic_result['moves_per_second'],
+                "gap_to_optimal": heuristic_result['optimal_cost'] - classical_result['optimal_cost']
             },
-            "sector_diversification": {
-                "enabled": request.sector_diversify,
-                "max_per_sector": request.max_per_sector if request.sector_diversify else None
-=======
-                    "selected_stocks": classical_tickers,
-                    "optimal_cost": classical_result['optimal_cost'],
-                    "expected_return": float(classical_portfolio_return),
-                    "portfolio_risk": float(classical_portfolio_risk),
-                    "sharpe_ratio": float(classical_sharpe),
-                    "computation_time": round(classical_time, 4),
-                    "combinations_evaluated": classical_result['total_combinations']
-                },
-                "qaoa": {
-                    "selected_stocks": selected_tickers,
-                    "optimal_cost": result['optimal_cost'],
-                    "expected_return": float(portfolio_return),
-                    "portfolio_risk": float(portfolio_risk),
-                    "sharpe_ratio": float(sharpe),
-                    "computation_time": round(qaoa_time, 4),
-                    "qaoa_iterations": result['iterations']
-                },
-                "results_match": results_match,
-                "speedup_factor": round(qaoa_time / classical_time, 2) if classical_time > 0 else None
->>>>>>> Stashed changes
+            "qaoa": {
+                "selected_stocks": selected_tickers, "optimal_cost": result['optimal_cost'],
+                "expected_return": port_return, "portfolio_risk": port_risk, "sharpe_ratio": sharpe,
+                "computation_time": round(qaoa_time, 4), "qaoa_iterations": result['iterations'],
+                "top_portfolios": [{
+                    "selected_stocks": [actual_tickers[i] for i in alt['selected_indices']],
+                    "optimal_cost": alt['cost'], "probability": alt['probability']
+                } for alt in result['top_portfolios']]
             },
-            "stock_metrics": stock_metrics,
-            "data_source": "mock_data" if all(s == 'mock_data' for s in stock_status.values()) else "yahoo_finance",
-            "computation_time": time.time() - start_time
-        }
+            "results_match": results_match
+        },
+        "sector_diversification": {
+            "enabled": request.sector_diversify,
+            "max_per_sector": request.max_per_sector if request.sector_diversify else None
+        },
+        "stock_metrics": stock_metrics,
+        "data_source": "mock_data" if all(s == 'mock_data' for s in stock_status.values()) else "yahoo_finance",
+        "risk_model": request.risk_model,
+        "computation_time": time.time() - start_time
+    }
+
+
+@app.post("/api/optimize")
+def optimize_portfolio(request: OptimizeRequest):
+    try:
+        return run_optimization(request)
+    except OptimizationError as e:
+        raise HTTPException(e.status_code, e.detail)
     except Exception as e:
         raise HTTPException(500, f"Optimization failed: {str(e)}")
 
 
+def prepare_batch(scenarios):
+    """Load prices once for the union of tickers; per scenario a `problem` tuple for run_optimization, or the OptimizationError.
+
+    Scenarios whose aligned dates match the whole union's take slices of one
+    union-wide returns/covariance estimate; the rest go through the memo, so
+    repeated baskets are estimated once.
+    """
+    closes, status = load_closes(list(dict.fromkeys(t for s in scenarios for t in s.stocks)))
+    union = price_frame(closes) if closes else None
+    union_estimate = None
+    problems = []
+    for scenario in scenarios:
+        try:
+            validate_request(scenario)
+            prices, stock_status = align_prices(scenario.stocks, closes, status)
+            check_available(prices, scenario.stocks, scenario.k)
+            if scenario.risk_model != 'sample':
+                problem = (prices, stock_status) + basket_returns_and_cov(prices, stock_status, scenario.risk_model)
+            elif union is not None and prices.index.equals(union.index) and prices.columns.isin(union.columns).all():
+                if union_estimate is None:
+                    union_estimate = calculate_returns_and_cov(union)
+                idx = union.columns.get_indexer(prices.columns)
+                problem = (prices, stock_status, union_estimate[0][idx], union_estimate[1][np.ix_(idx, idx)],
+                           returns_key(prices))
+            else:
+                problem = (prices, stock_status) + cached_returns_and_cov(prices)
+            problems.append(problem)
+        except OptimizationError as e:
+            problems.append(e)
+    return problems
+
+
+def run_scenario(index, request, problem):
+    """One batch scenario (in a worker process); returns its NDJSON record."""
+    try:
+        return {"index": index, "status": 200, "result": run_optimization(request, problem=problem)}
+    except OptimizationError as e:
+        return {"index": index, "status": e.status_code, "error": e.detail}
+    except Exception as e:
+        return {"index": index, "status": 500, "error": f"Optimization failed: {str(e)}"}
+
+
+def stream_batch(request):
+    """Yield one NDJSON line per scenario, in completion order; rejected scenarios come first
+    and chunked-mode scenarios last."""
+    def line(record):
+        return json.dumps(jsonable_encoder(record)) + "\n"
+
+    problems = prepare_batch(request.scenarios)
+    pending = []
+    for i, problem in enumerate(problems):
+        if isinstance(problem, OptimizationError):
+            yield line({"index": i, "status": problem.status_code, "error": problem.detail})
+        else:
+            pending.append(i)
+
+    # Chunked scenarios hold a 2^n state buffer each, so they run one at a time in this process
+    serial = [i for i in pending if request.scenarios[i].qaoa_mode == 'chunked']
+    pending = [i for i in pending if request.scenarios[i].qaoa_mode != 'chunked']
+    # A request may ask for fewer processes than the server allows, never more
+    workers = min(request.workers or BATCH_WORKERS, BATCH_WORKERS, len(pending))
+    if workers <= 1:
+        serial, pending = pending + serial, []
+    if pending:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(run_scenario, i, request.scenarios[i].model_dump(), problems[i]) for i in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                if record["status"] == 200:
+                    metrics.observe_report(record["result"]["timings"])
+                yield line(record)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    for i in serial:
+        yield line(run_scenario(i, request.scenarios[i], problems[i]))
+
+
+@app.post("/api/optimize/batch")
+def optimize_batch(request: BatchRequest):
+    """Optimize many scenarios in one call, streamed back as NDJSON: {"index", "status", "result" | "error"} per line."""
+    if not 1 <= len(request.scenarios) <= MAX_BATCH_SCENARIOS:
+        raise HTTPException(400, f"Between 1 and {MAX_BATCH_SCENARIOS} scenarios are supported")
+    if request.workers is not None and request.workers < 1:
+        raise HTTPException(400, "workers must be at least 1")
+    return StreamingResponse(stream_batch(request), media_type="application/x-ndjson")
+
+
+def run_frontier(request, progress=None):
+    """Trace the risk/return frontier: one data fetch and one (Q0, Q1) pair for every lambda point."""
+    start_time = time.time()
+    n = len(request.stocks)
+    if n > MAX_STOCKS:
+        raise OptimizationError(f"Too many stocks ({n}). Max {MAX_STOCKS}.")
+    if request.k < 1:
+        raise OptimizationError(f"k ({request.k}) must be at least 1")
+    if request.k > n:
+        raise OptimizationError(f"k ({request.k}) cannot exceed number of stocks ({n})")
+    if request.solver not in FRONTIER_SOLVERS:
+        raise OptimizationError(f"Unknown solver '{request.solver}'. Use one of: {', '.join(FRONTIER_SOLVERS)}")
+    lambdas = lambda_grid(request.lambdas, request.lambda_min, request.lambda_max, request.lambda_steps)
+    if not lambdas or len(lambdas) > MAX_FRONTIER_POINTS:
+        raise OptimizationError(f"Between 1 and {MAX_FRONTIER_POINTS} lambda values are supported")
+    if not all(0.0 <= lam <= 1.0 for lam in lambdas):
+        raise OptimizationError("lambda values must lie in [0, 1]")
+    if request.risk_model not in RISK_MODELS:
+        raise OptimizationError(f"Unknown risk_model '{request.risk_model}'. Use one of: {', '.join(RISK_MODELS)}")
+    if request.solver == 'qaoa':
+        validate_qaoa_size(n, request.k, request.qaoa_mode, request.mixer)
+
+    prices, stock_status = fetch_problem_data(request.stocks, request.k)
+    returns, covariance, data_key = basket_returns_and_cov(prices, stock_status, request.risk_model)
+    tickers = list(prices.columns)
+    sector_indices = sector_index_map(tickers) if request.sector_diversify else None
+    Q0, Q1 = cached_qubo_parts(data_key, returns, covariance, request.k, sector_indices, request.max_per_sector)
+
+    # No warm starts: points solved in parallel must not depend on what other workers just stored
+    qaoa_options = {'p': request.p, 'maxiter': request.maxiter, 'shots': request.shots,
+                    'mode': request.qaoa_mode, 'mixer': request.mixer, 'warm_start': False}
+    points = solve_frontier(returns, covariance, request.k, lambdas, Q0, Q1, solver=request.solver,
+                            sector_indices=sector_indices, time_limit=BNB_TIME_LIMIT,
+                            qaoa_options=qaoa_options, progress=progress)
+
+    frontier = []
+    for point in points:
+        port_return, port_risk, sharpe = compute_portfolio_metrics(returns, covariance, point['selected_indices'])
+        frontier.append({
+            "lambda": point['lambda'], "selected_stocks": [tickers[i] for i in point['selected_indices']],
+            "expected_return": port_return, "portfolio_risk": port_risk, "sharpe_ratio": sharpe,
+            "optimal_cost": point['optimal_cost'], "solver": point['solver'],
+            "computation_time": point['computation_time'], "proven_optimal": point['proven_optimal']
+        })
+    return {
+        "success": True, "k": request.k, "solver": request.solver, "tickers": tickers,
+        "frontier": frontier, "stock_status": stock_status,
+        "sector_diversification": {
+            "enabled": request.sector_diversify,
+            "max_per_sector": request.max_per_sector if request.sector_diversify else None
+        },
+        "computation_time": time.time() - start_time
+    }
+
+
+@app.post("/api/frontier")
+def efficient_frontier(request: FrontierRequest):
+    try:
+        return run_frontier(request)
+    except OptimizationError as e:
+        raise HTTPException(e.status_code, e.detail)
+    except Exception as e:
+        raise HTTPException(500, f"Frontier sweep failed: {str(e)}")
+
+
+def run_backtest(request, progress=None):
+    """Walk-forward backtest: rolling estimates over the fetched (or mock) history, one solve per rebalance."""
+    start_time = time.time()
+    n = len(request.stocks)
+    if n > MAX_STOCKS:
+        raise OptimizationError(f"Too many stocks ({n}). Max {MAX_STOCKS}.")
+    if request.k < 1:
+        raise OptimizationError(f"k ({request.k}) must be at least 1")
+    if request.k > n:
+        raise OptimizationError(f"k ({request.k}) cannot exceed number of stocks ({n})")
+    if request.solver not in FRONTIER_SOLVERS:
+        raise OptimizationError(f"Unknown solver '{request.solver}'. Use one of: {', '.join(FRONTIER_SOLVERS)}")
+    if request.window < 2 or request.rebalance_every < 1:
+        raise OptimizationError("window must be at least 2 days and rebalance_every at least 1")
+    if request.solver == 'qaoa':
+        validate_qaoa_size(n, request.k, request.qaoa_mode, request.mixer)
+
+    if request.mock_data:
+        prices, stock_status = generate_mock_data(request.stocks, request.period), {s: 'mock_data' for s in request.stocks}
+    else:
+        prices, stock_status = fetch_problem_data(request.stocks, request.k, request.period)
+    log_returns = np.log(prices / prices.shift(1)).dropna()
+    n_rebalances = -(-(len(log_returns) - request.window) // request.rebalance_every)
+    if n_rebalances < 1:
+        raise OptimizationError(f"Only {len(log_returns)} days of returns; need more than window={request.window}")
+    if n_rebalances > MAX_REBALANCES:
+        raise OptimizationError(f"{n_rebalances} rebalances requested. Max {MAX_REBALANCES}; increase rebalance_every.")
+    tickers = list(prices.columns)
+    sector_indices = sector_index_map(tickers) if request.sector_diversify else None
+
+    # No warm starts: points solved in parallel must not depend on what other workers just stored
+    qaoa_options = {'p': request.p, 'maxiter': request.maxiter, 'shots': request.shots,
+                    'mode': request.qaoa_mode, 'mixer': request.mixer, 'warm_start': False}
+    result = backtest_portfolio(log_returns.values, request.k, lambda_param=request.lambda_param,
+                                window=request.window, step=request.rebalance_every, solver=request.solver,
+                                sector_indices=sector_indices, max_per_sector=request.max_per_sector,
+                                time_limit=BNB_TIME_LIMIT, qaoa_options=qaoa_options, progress=progress)
+
+    dates = log_returns.index
+    rebalances = [{
+        "date": str(dates[r['index']].date()), "selected_stocks": [tickers[i] for i in r['selected_indices']],
+        "turnover": r['turnover'], "period_return": r['period_return'], "optimal_cost": r['optimal_cost'],
+        "solver": r['solver'], "computation_time": r['computation_time']
+    } for r in result['rebalances']]
+    first = result['rebalances'][0]['index']
+    return {
+        "success": True, "k": request.k, "solver": request.solver, "tickers": tickers,
+        "window": request.window, "rebalance_every": request.rebalance_every,
+        "start_date": str(dates[first].date()), "end_date": str(dates[-1].date()),
+        "performance": result['performance'], "benchmark": result['benchmark'], "rebalances": rebalances,
+        "daily_returns": result['daily_returns'].tolist(), "stock_status": stock_status,
+        "data_source": "mock_data" if all(s == 'mock_data' for s in stock_status.values()) else "yahoo_finance",
+        "computation_time": time.time() - start_time
+    }
+
+
+@app.post("/api/backtest")
+def backtest(request: BacktestRequest):
+    try:
+        return run_backtest(request)
+    except OptimizationError as e:
+        raise HTTPException(e.status_code, e.detail)
+    except Exception as e:
+        raise HTTPException(500, f"Backtest failed: {str(e)}")
+
+
+@app.post("/api/jobs", status_code=202)
+def submit_job(request: OptimizeRequest):
+    """Queue an optimization on the worker pool and return its job id immediately."""
+    try:
+        validate_request(request)
+        job_id = job_manager.submit(run_optimization, request.model_dump())
+    except OptimizationError as e:
+        raise HTTPException(e.status_code, e.detail)
+    except JobQueueFull as e:
+        raise HTTPException(429, f"Job queue is full ({e}). Retry later.", headers={"Retry-After": "5"})
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/api/jobs")
+def list_jobs():
+    return job_manager.stats()
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    try:
+        return job_manager.status(job_id)
+    except KeyError:
+        raise HTTPException(404, f"Unknown job {job_id}")
+
+
+@app.post("/api/jobs/{job_id}/stop")
+def stop_job(job_id: str):
+    """Stop the QAOA loop early (e.g. once the energy plateaus) and finish with the best angles so far."""
+    try:
+        return job_manager.stop(job_id)
+    except KeyError:
+        raise HTTPException(404, f"Unknown job {job_id}")
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job(job_id: str, request: Request):
+    """Server-Sent Events for a job: `progress` events as the solver reports (at most one per
+    PROGRESS_INTERVAL), then a final `result`, `error` or `cancelled` event."""
+    try:
+        job_manager.status(job_id)
+    except KeyError:
+        raise HTTPException(404, f"Unknown job {job_id}")
+
+    async def events():
+        cursor, last_sent = 0, time.time()
+        while not await request.is_disconnected():
+            status = await asyncio.to_thread(job_manager.status, job_id)
+            # Read events after the status so nothing logged before completion is missed
+            batch, cursor = await asyncio.to_thread(job_manager.events, job_id, cursor)
+            for event in batch:
+                yield _sse('progress', event)
+            if batch:
+                last_sent = time.time()
+
+            if status['status'] == 'completed':
+                yield _sse('result', status['result'])
+                return
+            if status['status'] in ('failed', 'cancelled'):
+                yield _sse('error' if status['status'] == 'failed' else 'cancelled',
+                           {'status': status['status'], 'error': status.get('error')})
+                return
+            # Comment lines keep idle connections alive through proxies
+            if time.time() - last_sent > SSE_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    try:
+        return job_manager.cancel(job_id)
+    except KeyError:
+        raise HTTPException(404, f"Unknown job {job_id}")
+
+
 if __name__ == "__main__":
     print("Starting Quantum Portfolio Optimizer API...")
     print("API docs: http://localhost:8000/docs")
@@ -0,0 +1,151 @@
+import os
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from frontier import solve_point
+from qaoa import build_qubo_parts
+
+TRADING_DAYS = 252
+
+
+class RollingMoments:
+    """Mean and sample covariance of a sliding window of return rows.
+
+    add() and drop() are Welford rank-one updates, O(n^2) per day instead of
+    re-estimating the whole window.
+    """
+
+    def __init__(self, n):
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros((n, n))
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += np.outer(delta, x - self.mean)
+
+    def drop(self, x):
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= np.outer(delta, x - self.mean)
+
+    def annualized(self):
+        """(returns, covariance) scaled like calculate_returns_and_cov."""
+        return self.mean * TRADING_DAYS, self.m2 / (self.count - 1) * TRADING_DAYS
+
+
+def rebalance_dates(n_days, window, step):
+    """Row indices t where a portfolio is chosen from rows [t - window, t) and held until t + step."""
+    return list(range(window, n_days, step))
+
+
+def rolling_estimates(log_returns, window, step):
+    """Annualized (returns, covariance) at every rebalance date, rolling one day at a time."""
+    moments = RollingMoments(log_returns.shape[1])
+    estimates, t = [], 0
+    for date in rebalance_dates(len(log_returns), window, step):
+        for t in range(t, date):
+            moments.add(log_returns[t])
+            if moments.count > window:
+                moments.drop(log_returns[t - window])
+        t = date
+        estimates.append(moments.annualized())
+    return estimates
+
+
+def _solve_rebalance(estimate, k, lambda_param, solver, sector_indices=None, max_per_sector=1,
+                     time_limit=None, qaoa_options=None):
+    returns, covariance = estimate
+    Q0, Q1 = build_qubo_parts(returns, covariance, k, sector_indices, max_per_sector)
+    groups = list(sector_indices.values()) if sector_indices else None
+    return solve_point(lambda_param, Q0, Q1, returns, covariance, k, solver, groups=groups,
+                       time_limit=time_limit, qaoa_options=qaoa_options)
+
+
+def _performance(daily):
+    """Realized statistics of a series of daily simple returns."""
+    wealth = np.cumprod(1 + daily)
+    total = float(wealth[-1] - 1)
+    annual_return = float(wealth[-1] ** (TRADING_DAYS / len(daily)) - 1)
+    volatility = float(np.std(daily, ddof=1) * np.sqrt(TRADING_DAYS)) if len(daily) > 1 else 0.0
+    drawdown = float(np.max(1 - wealth / np.maximum.accumulate(np.concatenate([[1.0], wealth]))[1:]))
+    return {'total_return': total, 'annualized_return': annual_return, 'annualized_volatility': volatility,
+            'sharpe_ratio': annual_return / volatility if volatility > 0 else 0, 'max_drawdown': drawdown}
+
+
+def _hold(log_returns, weights):
+    """Buy-and-hold `weights` over the rows of log_returns; returns (daily simple returns, end weights)."""
+    growth = np.cumprod(np.exp(log_returns), axis=0) * weights
+    value = growth.sum(axis=1)
+    daily = value / np.concatenate([[1.0], value[:-1]]) - 1
+    return daily, growth[-1] / value[-1]
+
+
+def backtest_portfolio(log_returns, k, lambda_param=0.5, window=126, step=21, solver='exact', sector_indices=None,
+                       max_per_sector=1, time_limit=None, qaoa_options=None, workers=None, progress=None):
+    """Walk-forward test of the k-asset selection on a (days x assets) array of daily log returns.
+
+    At every rebalance date the portfolio is re-solved from the trailing
+    `window` days and held equal-weighted (buy-and-hold) for the next `step`
+    days. Rebalances are independent once the rolling estimates are known, so
+    they are solved on a process pool (one at a time for chunked QAOA). Turnover is the one-way traded fraction
+    0.5 * sum|w_target - w_drifted| (the first purchase counts as 1).
+    `progress(stage, **fields)` is called as rebalances finish.
+    """
+    log_returns = np.asarray(log_returns, dtype=float)
+    n_days, n = log_returns.shape
+    dates = rebalance_dates(n_days, window, step)
+    if not dates:
+        raise ValueError(f"Need more than {window} days of returns for a {window}-day window")
+    estimates = rolling_estimates(log_returns, window, step)
+
+    run = partial(_solve_rebalance, k=k, lambda_param=lambda_param, solver=solver, sector_indices=sector_indices,
+                  max_per_sector=max_per_sector, time_limit=time_limit, qaoa_options=qaoa_options)
+    workers = min(workers or os.cpu_count() or 1, len(dates))
+    if solver == 'qaoa' and (qaoa_options or {}).get('mode') == 'chunked':
+        workers = 1  # every rebalance process would hold its own 2^n state buffer
+    solved = {}
+    if workers <= 1:
+        for i, estimate in enumerate(estimates):
+            solved[i] = run(estimate)
+            if progress is not None:
+                progress('backtest', solved=len(solved), total=len(dates))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run, estimate): i for i, estimate in enumerate(estimates)}
+            for future in as_completed(futures):
+                solved[futures[future]] = future.result()
+                if progress is not None:
+                    progress('backtest', solved=len(solved), total=len(dates))
+
+    daily, benchmark_daily, rebalances = [], [], []
+    held = np.zeros(n)
+    for i, date in enumerate(dates):
+        end = min(date + step, n_days)
+        target = np.zeros(n)
+        target[solved[i]['selected_indices']] = 1.0 / k
+        turnover = 0.5 * float(np.abs(target - held).sum()) if i else 1.0
+        period, held = _hold(log_returns[date:end], target)
+        benchmark_period, _ = _hold(log_returns[date:end], np.full(n, 1.0 / n))
+        daily.append(period)
+        benchmark_daily.append(benchmark_period)
+        rebalances.append({'index': date, 'selected_indices': solved[i]['selected_indices'],
+                           'turnover': turnover, 'period_return': float(np.prod(1 + period) - 1),
+                           'optimal_cost': solved[i]['optimal_cost'], 'solver': solved[i]['solver'],
+                           'computation_time': solved[i]['computation_time']})
+
+    daily = np.concatenate(daily)
+    turnovers = [r['turnover'] for r in rebalances[1:]]
+    years = len(daily) / TRADING_DAYS
+    return {
+        'rebalances': rebalances,
+        'daily_returns': daily,
+        'performance': {**_performance(daily), 'days': len(daily),
+                        'average_turnover': float(np.mean(turnovers)) if turnovers else 0.0,
+                        'annualized_turnover': float(np.sum(turnovers) / years) if years > 0 else 0.0},
+        'benchmark': _performance(np.concatenate(benchmark_daily))
+    }
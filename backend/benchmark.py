@@ -0,0 +1,172 @@
+"""Reproducible benchmark of the optimization pipeline on mock data.
+
+Sweeps every combination of n, k, p, shots and maxiter, times each stage on its
+own (data, covariance, QUBO build, Ising conversion, circuit build, QAOA
+simulation, brute force, optionally the whole API call) and records the QAOA
+approximation ratio against the exact optimum. Results are written as JSON;
+--compare reports per-stage slowdowns and quality drops against an earlier
+run and exits non-zero on a regression.
+
+    python backend/benchmark.py --n 8 12 16 --k 3 --p 1 2 --out bench.json
+    python backend/benchmark.py --compare bench.json --out bench-new.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import qiskit
+
+from classical import brute_force_search
+from qaoa import build_qubo_matrix, qubo_to_ising, create_qaoa_circuit, optimize_qaoa, _qaoa_template
+from stocks import NIFTY_50, generate_mock_data, calculate_returns_and_cov
+
+CASE_KEYS = ('n', 'k', 'p', 'shots', 'maxiter', 'mode', 'mixer', 'lambda')
+NOISE_FLOOR = 0.005  # seconds; stage changes below this are ignored by --compare
+
+
+def _timed(fn, repeat):
+    """(last result, [seconds per run]) over `repeat` runs of fn()."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - start)
+    return value, times
+
+
+def _summary(times):
+    return {'min': min(times), 'median': float(np.median(times)), 'runs': len(times)}
+
+
+def run_case(n, k, p, shots, maxiter, mode='exact', mixer='x', lambda_param=0.5, repeat=3, api=False):
+    """Benchmark one configuration; returns {'case', 'stages', 'quality', 'qaoa'}."""
+    tickers = list(NIFTY_50)[:n]
+    stages = {}
+    prices, stages['data'] = _timed(lambda: generate_mock_data(tickers), repeat)
+    (returns, covariance), stages['covariance'] = _timed(lambda: calculate_returns_and_cov(prices), repeat)
+    Q, stages['qubo'] = _timed(lambda: build_qubo_matrix(returns, covariance, k, lambda_param), repeat)
+    (h, J, offset), stages['ising'] = _timed(lambda: qubo_to_ising(Q.copy()), repeat)
+
+    def circuit():
+        _qaoa_template.cache_clear()
+        return create_qaoa_circuit([0.1] * p, [0.2] * p, h, J, n, mixer, k)
+    _, stages['circuit'] = _timed(circuit, repeat)
+
+    qaoa, stages['simulation'] = _timed(lambda: optimize_qaoa(
+        returns, covariance, k, lambda_param=lambda_param, p=p, maxiter=maxiter, shots=shots, mode=mode,
+        qubo=(Q, h, J, offset), mixer=mixer, warm_start=False), repeat)
+    exact, stages['brute_force'] = _timed(lambda: brute_force_search(Q, k, workers=1), repeat)
+
+    if api:
+        from api import run_optimization
+        request = {'stocks': tickers, 'k': k, 'lambda_param': lambda_param, 'p': p, 'maxiter': maxiter,
+                   'shots': shots, 'qaoa_mode': mode, 'mixer': mixer, 'warm_start': False}
+        _, stages['api'] = _timed(lambda: run_optimization(request), repeat)
+
+    # Approximation ratio over feasible portfolios: 1 at the optimum, 0 at the worst k-subset
+    worst = -brute_force_search(-Q, k, workers=1)['optimal_cost']
+    best = exact['optimal_cost']
+    ratio = (worst - qaoa['optimal_cost']) / (worst - best) if worst > best else 1.0
+    return {
+        'case': dict(zip(CASE_KEYS, (n, k, p, shots, maxiter, mode, mixer, lambda_param))),
+        'stages': {stage: _summary(times) for stage, times in stages.items()},
+        'quality': {'approximation_ratio': float(ratio), 'found_optimum': bool(qaoa['optimal_cost'] <= best + 1e-9),
+                    'qaoa_cost': qaoa['optimal_cost'], 'optimal_cost': best, 'worst_cost': worst,
+                    'final_energy': qaoa['final_energy']},
+        'qaoa': {'iterations': qaoa['iterations'], 'evaluations': qaoa['total_evaluations'],
+                 'state_dimension': qaoa['state_dimension']}
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'qiskit': qiskit.__version__,
+            'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+            'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def _case_id(case):
+    return tuple(case[key] for key in CASE_KEYS)
+
+
+def compare(baseline, current, threshold=0.2, quality_tolerance=0.01):
+    """Regressions of `current` against `baseline` (both benchmark JSON dicts) as a list of messages."""
+    previous = {_case_id(r['case']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(_case_id(result['case']))
+        label = ' '.join(f"{key}={result['case'][key]}" for key in CASE_KEYS)
+        if old is None:
+            print(f"  {label}: no baseline")
+            continue
+        cells = []
+        for stage, timing in result['stages'].items():
+            if stage not in old['stages']:
+                continue
+            before, after = old['stages'][stage]['min'], timing['min']
+            ratio = after / before if before > 0 else float('inf')
+            cells.append(f"{stage} {ratio:.2f}x")
+            if ratio > 1 + threshold and after - before > NOISE_FLOOR:
+                regressions.append(f"{label}: {stage} {before * 1e3:.1f}ms -> {after * 1e3:.1f}ms ({ratio:.2f}x)")
+        before, after = old['quality']['approximation_ratio'], result['quality']['approximation_ratio']
+        cells.append(f"ratio {before:.3f}->{after:.3f}")
+        if after < before - quality_tolerance:
+            regressions.append(f"{label}: approximation ratio {before:.3f} -> {after:.3f}")
+        print(f"  {label}: " + ', '.join(cells))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, nargs='+', default=[6, 10, 14])
+    parser.add_argument('--k', type=int, nargs='+', default=[3])
+    parser.add_argument('--p', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--shots', type=int, nargs='+', default=[1024])
+    parser.add_argument('--maxiter', type=int, nargs='+', default=[50])
+    parser.add_argument('--mode', default='exact', choices=['exact', 'sampler', 'chunked'])
+    parser.add_argument('--mixer', default='x', choices=['x', 'xy_ring', 'xy_complete'])
+    parser.add_argument('--lambda', dest='lambda_param', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--api', action='store_true', help='also time the full run_optimization call')
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier --out file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown per stage')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n, k, p, shots, maxiter in product(args.n, args.k, args.p, args.shots, args.maxiter):
+        if not 0 < k < n or n > len(NIFTY_50):
+            continue
+        print(f"n={n} k={k} p={p} shots={shots} maxiter={maxiter}...")
+        result = run_case(n, k, p, shots, maxiter, args.mode, args.mixer, args.lambda_param, args.repeat, args.api)
+        print("  " + ', '.join(f"{s} {t['min'] * 1e3:.1f}ms" for s, t in result['stages'].items())
+              + f", ratio {result['quality']['approximation_ratio']:.3f}")
+        results.append(result)
+
+    report = {'environment': environment(), 'settings': vars(args), 'results': results}
+    Path(args.out).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(results)} cases to {args.out}")
+
+    if args.compare:
+        print(f"Comparing against {args.compare}:")
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.threshold)
+        for message in regressions:
+            print(f"  REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import os
+import time
+import numpy as np
+from math import comb
+from itertools import chain, combinations, islice
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_ELEMENTS = 2_000_000
+SHARD_SIZE = 200_000
+PARALLEL_THRESHOLD = 500_000
+BRUTE_FORCE_LIMIT = 1_000_000
+
+
+def _shard_prefixes(n, k, prefix=()):
+    """Split C(n, k) into lexicographically ordered prefixes of at most SHARD_SIZE combinations."""
+    start = prefix[-1] + 1 if prefix else 0
+    remaining = k - len(prefix)
+    if remaining == 0 or comb(n - start, remaining) <= SHARD_SIZE:
+        yield prefix
+        return
+    for i in range(start, n - remaining + 1):
+        yield from _shard_prefixes(n, k, prefix + (i,))
+
+
+def _search_shard(Q, k, prefix):
+    """Evaluate every combination extending `prefix` in batches."""
+    n = Q.shape[0]
+    start = prefix[-1] + 1 if prefix else 0
+    rest = k - len(prefix)
+    combos = combinations(range(start, n), rest)
+
+    p = list(prefix)
+    if rest == 0:
+        return float(Q[np.ix_(p, p)].sum()), p, 1
+
+    # Score each batch as rows of a 0/1 matrix: cost = rowsum((X @ Q) * X), one BLAS call per batch
+    chunk = max(1024, CHUNK_ELEMENTS // n)
+    best_cost, best_combo, total = float('inf'), None, 0
+    while True:
+        flat = np.fromiter(chain.from_iterable(islice(combos, chunk)), dtype=np.intp)
+        if not flat.size:
+            break
+        idx = flat.reshape(-1, rest)
+        X = np.zeros((len(idx), n))
+        X[:, p] = 1.0
+        np.put_along_axis(X, idx, 1.0, axis=1)
+        costs = np.einsum('ij,ij->i', X @ Q, X)
+        best = int(np.argmin(costs))
+        if costs[best] < best_cost:
+            best_cost, best_combo = float(costs[best]), p + idx[best].tolist()
+        total += len(costs)
+    return best_cost, best_combo, total
+
+
+def brute_force_search(Q, k, workers=None, progress=None):
+    """Exhaustively minimize x @ Q @ x over all x with exactly k ones.
+
+    Combinations are scored in NumPy batches; large searches are sharded by
+    lexicographic prefix across a process pool. Ties resolve to the
+    lexicographically first combination, as with a plain combinations() loop.
+    `progress(stage, **fields)` is called after every shard.
+    """
+    n = Q.shape[0]
+    Q = np.asarray(Q, dtype=float)
+    start_time = time.time()
+    prefixes = list(_shard_prefixes(n, k))
+    workers = workers or os.cpu_count() or 1
+
+    pool = None
+    if workers > 1 and len(prefixes) > 1 and comb(n, k) >= PARALLEL_THRESHOLD:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        shards = pool.map(_search_shard, [Q] * len(prefixes), [k] * len(prefixes), prefixes)
+    else:
+        shards = (_search_shard(Q, k, prefix) for prefix in prefixes)
+
+    best_cost, best_indices, total = float('inf'), None, 0
+    try:
+        for cost, combo, count in shards:
+            total += count
+            if cost < best_cost:
+                best_cost, best_indices = cost, combo
+            if progress is not None:
+                progress('brute_force', evaluated=total, total=comb(n, k), best_cost=best_cost)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.time() - start_time
+    return {
+        'selected_indices': best_indices,
+        'optimal_bitstring': ''.join('1' if i in best_indices else '0' for i in range(n)),
+        'optimal_cost': best_cost,
+        'total_combinations': total,
+        'computation_time': elapsed,
+        'combinations_per_second': total / elapsed if elapsed > 0 else None
+    }
+
+
+BNB_PROGRESS_EVERY = 2000
+
+
+def _greedy_incumbent(Q, W, k):
+    """Greedy pick by marginal cost, then first-improvement swaps until no swap helps."""
+    n = Q.shape[0]
+    d = np.diag(Q).copy()
+    chosen, marginal = [], d.copy()
+    for _ in range(k):
+        masked = np.where(np.isin(np.arange(n), chosen), np.inf, marginal)
+        j = int(np.argmin(masked))
+        chosen.append(j)
+        marginal = marginal + W[j]
+    x = np.zeros(n, dtype=bool)
+    x[chosen] = True
+    improved = True
+    while improved:
+        improved = False
+        # Swapping i out and j in changes the cost by F[j] - F[i] - W[i, j], F = d + W @ x
+        F = d + W[:, x].sum(axis=1)
+        inside, outside = np.flatnonzero(x), np.flatnonzero(~x)
+        if not len(inside) or not len(outside):
+            break
+        delta = F[outside][None, :] - F[inside][:, None] - W[np.ix_(inside, outside)]
+        a, b = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[a, b] < -1e-12:
+            x[inside[a]], x[outside[b]] = False, True
+            improved = True
+    selected = np.flatnonzero(x)
+    return float(Q[np.ix_(selected, selected)].sum()), selected.tolist()
+
+
+def branch_and_bound_search(Q, k, groups=None, progress=None, time_limit=None, tol=1e-9):
+    """Exactly minimize x @ Q @ x over all x with exactly k ones by branch-and-bound.
+
+    With W = Q + Q.T (zero diagonal), adding candidate j to a partial selection S
+    costs g[j] = Q[j, j] + W[S, j]. When r more assets must be picked from the
+    candidates R, each j in R can contribute at most g[j] plus half of its r - 1
+    smallest couplings inside R, so the r smallest such scores bound every
+    completion from below. `groups` (e.g. sector index lists) tightens this:
+    the smallest coupling c inside each group is charged exactly, c * m(m - 1)/2
+    for m picks from the group, which is what prunes sector-concentrated
+    branches when sector penalties are in Q. Nodes branch on the most promising
+    candidate (take it / drop it), candidates that cannot beat the incumbent on
+    their own are dropped, and the search starts from a greedy + swap incumbent.
+    The optimum cost matches brute_force_search (ties may resolve to a
+    different, equally cheap selection). If `time_limit` seconds pass first,
+    the best selection found so far is returned with proven_optimal=False.
+    `progress(stage, **fields)` is called every BNB_PROGRESS_EVERY nodes.
+    """
+    n = Q.shape[0]
+    Q = np.asarray(Q, dtype=float)
+    W = Q + Q.T
+    W[np.diag_indices(n)] = 0.0
+    group_of = np.zeros(n, dtype=np.intp)
+    for label, members in enumerate(groups or ()):
+        group_of[list(members)] = label + 1
+    group_sizes = np.bincount(group_of, minlength=len(groups or ()) + 1)
+    start_time = time.time()
+
+    best_cost, best_indices = _greedy_incumbent(Q, W, k)
+    nodes, timed_out = 0, False
+
+    def bound_terms(g, R, r, labels=None):
+        """Per-candidate lower bounds on the cost of picking it (`scores`) and of
+        picking it as the next member of its group (`increments`), plus the
+        coupling every completion pays regardless of which r are picked."""
+        if r == 1:
+            return g[R], g[R], 0.0
+        # Couplings shared by every pair (the cardinality penalty) are charged exactly as well
+        couplings = W[np.ix_(R, R)]
+        couplings[np.diag_indices(len(R))] = np.inf
+        shared = couplings.min()
+        couplings -= shared
+        if labels is None:
+            scores = g[R] + 0.5 * np.partition(couplings, r - 2, axis=1)[:, :r - 1].sum(axis=1)
+            return scores, scores, shared * r * (r - 1) / 2
+
+        same = labels[:, None] == labels[None, :]
+        floor = np.full(len(group_sizes), np.inf)
+        np.minimum.at(floor, labels, np.where(same, couplings, np.inf).min(axis=1))
+        floor[~np.isfinite(floor)] = 0.0
+        couplings -= same * floor[labels][:, None]
+        scores = g[R] + 0.5 * np.partition(couplings, r - 2, axis=1)[:, :r - 1].sum(axis=1)
+
+        order = np.lexsort((scores, labels))
+        sorted_labels = labels[order]
+        rank = np.arange(len(R)) - np.searchsorted(sorted_labels, sorted_labels)
+        increments = np.empty(len(R))
+        increments[order] = scores[order] + floor[sorted_labels] * rank
+        return scores, increments, shared * r * (r - 1) / 2
+
+    def visit(selected, cost, g, R, r):
+        nonlocal best_cost, best_indices, nodes, timed_out
+        if timed_out:
+            return
+        nodes += 1
+        if nodes % BNB_PROGRESS_EVERY == 0:
+            if progress is not None:
+                progress('branch_and_bound', nodes=nodes, best_cost=best_cost)
+            if time_limit is not None and time.time() - start_time > time_limit:
+                timed_out = True
+                return
+        if r == 0 or len(R) == r:
+            chosen = selected + R[:r].tolist()
+            total = float(Q[np.ix_(chosen, chosen)].sum())
+            if total < best_cost:
+                best_cost, best_indices = total, sorted(chosen)
+            return
+
+        # The grouped and plain bounds are both valid and neither dominates, so prune on either
+        cutoff = best_cost - tol * max(1.0, abs(best_cost))
+        keep = np.ones(len(R), dtype=bool)
+        for labels in ([group_of[R], None] if groups else [None]):
+            scores, increments, base = bound_terms(g, R, r, labels)
+            base += cost
+            order = np.argsort(increments, kind='stable')
+            if base + increments[order[:r]].sum() > cutoff:
+                return
+            # A candidate outside the r - 1 best can only enter alongside r - 1 others
+            keep[order[r - 1:]] &= base + increments[order[:r - 1]].sum() + scores[order[r - 1:]] <= cutoff
+        R, increments = R[keep], increments[keep]
+        if len(R) < r:
+            return
+
+        j = int(R[np.argmin(increments)])
+        rest = R[R != j]
+        visit(selected + [j], cost + g[j], g + W[j], rest, r - 1)
+        if len(rest) >= r:
+            visit(selected, cost, g, rest, r)
+
+    visit([], 0.0, np.diag(Q).copy(), np.arange(n), k)
+
+    elapsed = time.time() - start_time
+    return {
+        'selected_indices': best_indices,
+        'optimal_bitstring': ''.join('1' if i in best_indices else '0' for i in range(n)),
+        'optimal_cost': best_cost,
+        'total_combinations': comb(n, k),
+        'nodes_explored': nodes,
+        'proven_optimal': not timed_out,
+        'computation_time': elapsed,
+    }
@@ -0,0 +1,116 @@
+"""Round-trip consistency check for the vectorized QUBO/Ising builders.
+
+Compares build_qubo_matrix, qubo_to_ising and build_cost_hamiltonian against
+the original element-by-element loops and requires exact (bitwise) equality,
+then checks that the Ising form reproduces x @ Q @ x on every basis state.
+
+    python backend/consistency.py
+"""
+import numpy as np
+from qiskit.quantum_info import SparsePauliOp
+
+from qaoa import build_qubo_matrix, qubo_to_ising, build_cost_hamiltonian
+from statevector import cost_diagonal
+from stocks import NIFTY_50, generate_mock_data, calculate_returns_and_cov
+
+
+def reference_qubo_matrix(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
+    n = len(returns)
+    penalty = max(10.0, 2.0 * max(np.max(np.abs(covariance)), np.max(np.abs(returns))) * n)
+    Q = np.zeros((n, n))
+    for i in range(n):
+        Q[i, i] = lambda_param * covariance[i, i] - (1 - lambda_param) * returns[i] + penalty * (1 - 2 * k)
+    for i in range(n):
+        for j in range(i + 1, n):
+            Q[i, j] = 2.0 * (lambda_param * covariance[i, j] + penalty)
+    if sector_indices:
+        sector_penalty = penalty * 0.5
+        for sector_name, indices in sector_indices.items():
+            if len(indices) <= max_per_sector:
+                continue
+            for i in indices:
+                Q[i, i] += sector_penalty * (1 - 2 * max_per_sector)
+            for idx_a in range(len(indices)):
+                for idx_b in range(idx_a + 1, len(indices)):
+                    i, j = indices[idx_a], indices[idx_b]
+                    if i < j:
+                        Q[i, j] += 2.0 * sector_penalty
+                    else:
+                        Q[j, i] += 2.0 * sector_penalty
+    return Q
+
+
+def reference_qubo_to_ising(Q):
+    n = Q.shape[0]
+    h, J, offset = np.zeros(n), np.zeros((n, n)), 0.0
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                offset += Q[i, i] / 2
+                h[i] -= Q[i, i] / 2
+            else:
+                offset += Q[i, j] / 4
+                h[i] -= Q[i, j] / 4
+                h[j] -= Q[i, j] / 4
+                if i < j:
+                    J[i, j] += Q[i, j] / 4
+                else:
+                    J[j, i] += Q[i, j] / 4
+    return h, J, offset
+
+
+def reference_cost_hamiltonian(h, J, n):
+    pauli_list, coeffs = [], []
+    for i in range(n):
+        if h[i] != 0:
+            pauli = ['I'] * n
+            pauli[n - 1 - i] = 'Z'
+            pauli_list.append(''.join(pauli))
+            coeffs.append(h[i])
+    for i in range(n):
+        for j in range(i + 1, n):
+            if J[i, j] != 0:
+                pauli = ['I'] * n
+                pauli[n - 1 - i] = 'Z'
+                pauli[n - 1 - j] = 'Z'
+                pauli_list.append(''.join(pauli))
+                coeffs.append(J[i, j])
+    return SparsePauliOp(pauli_list, coeffs) if pauli_list else SparsePauliOp(['I' * n], [0.0])
+
+
+def check_roundtrip(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
+    """Raise AssertionError if any vectorized output differs from the reference loops."""
+    n = len(returns)
+    Q = build_qubo_matrix(returns, covariance, k, lambda_param, sector_indices, max_per_sector)
+    assert np.array_equal(Q, reference_qubo_matrix(returns, covariance, k, lambda_param,
+                                                   sector_indices, max_per_sector)), "QUBO matrix differs"
+
+    h, J, offset = qubo_to_ising(Q)
+    ref_h, ref_J, ref_offset = reference_qubo_to_ising(Q)
+    assert np.array_equal(h, ref_h), "Ising h differs"
+    assert np.array_equal(J, ref_J), "Ising J differs"
+    assert offset == ref_offset, "Ising offset differs"
+
+    op, ref_op = build_cost_hamiltonian(h, J, n), reference_cost_hamiltonian(ref_h, ref_J, n)
+    assert list(op.paulis.to_labels()) == list(ref_op.paulis.to_labels()), "Pauli terms differ"
+    assert np.array_equal(op.coeffs, ref_op.coeffs), "Pauli coefficients differ"
+
+    # Round trip: offset + h.z + z.J.z must reproduce x @ Q @ x with z = 1 - 2x
+    if n <= 16:
+        z = 1 - 2 * ((np.arange(1 << n)[:, None] >> np.arange(n)) & 1)
+        ising = offset + z @ h + np.einsum('bi,ij,bj->b', z, J, z)
+        assert np.allclose(ising, cost_diagonal(Q), rtol=1e-12, atol=1e-9), "Ising energies differ from QUBO"
+
+
+if __name__ == "__main__":
+    tickers = list(NIFTY_50)
+    for n, k, lam, diversify in [(4, 2, 0.5, False), (8, 3, 0.2, True), (12, 5, 0.8, True), (20, 10, 0.5, True)]:
+        returns, covariance = calculate_returns_and_cov(generate_mock_data(tickers[:n]))
+        sectors = None
+        if diversify:
+            sectors = {}
+            for i, ticker in enumerate(tickers[:n]):
+                sectors.setdefault(NIFTY_50[ticker]['sector'], []).append(i)
+        check_roundtrip(returns, covariance, k, lam, sectors, max_per_sector=1)
+        print(f"  + n={n} k={k} lambda={lam} sectors={diversify}: identical")
+    print("QUBO/Ising builders match the reference implementation.")
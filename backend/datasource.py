@@ -0,0 +1,122 @@
+import os
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from price_cache import period_offset
+
+
+class DataSource:
+    """Market-data source interface.
+
+    fetch(symbols, period, start) returns {symbol: Series of daily closes}; symbols
+    that could not be fetched are simply left out. Subclasses implement fetch_one
+    and inherit a bounded thread-pool fan-out with an overall timeout, or override
+    fetch when the backend can serve many symbols in one call.
+    """
+    max_workers = 8
+    timeout = 20.0
+
+    def fetch_one(self, symbol, period='2y', start=None):
+        raise NotImplementedError
+
+    def fetch(self, symbols, period='2y', start=None):
+        if not symbols:
+            return {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols)))
+        futures = {pool.submit(self.fetch_one, symbol, period, start): symbol for symbol in symbols}
+        done, pending = wait(futures, timeout=self.timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        closes = {}
+        for future in done:
+            symbol = futures[future]
+            try:
+                series = future.result()
+            except Exception as e:
+                print(f"  x {symbol}: {str(e)[:60]}")
+                continue
+            if series is not None and not series.empty:
+                closes[symbol] = series
+        for future in pending:
+            print(f"  x {futures[future]}: timed out after {self.timeout:.0f}s")
+        return closes
+
+
+def _close_column(frame):
+    close = frame['Close'] if 'Close' in frame.columns else frame.iloc[:, 0]
+    close = close.iloc[:, 0] if isinstance(close, pd.DataFrame) else close
+    return close.dropna()
+
+
+class YahooDataSource(DataSource):
+    """Yahoo Finance via yfinance, fetching the whole basket in one multi-ticker download."""
+
+    def __init__(self, max_workers=8, timeout=20.0):
+        self.max_workers, self.timeout = max_workers, timeout
+
+    def _download(self, symbols, period, start):
+        import yfinance as yf
+        window = {'start': start} if start is not None else {'period': period}
+        return yf.download(symbols, progress=False, auto_adjust=True, group_by='ticker',
+                           threads=self.max_workers, timeout=self.timeout, **window)
+
+    def fetch_one(self, symbol, period='2y', start=None):
+        data = self._download([symbol], period, start)
+        return None if data.empty else _close_column(data[symbol])
+
+    def fetch(self, symbols, period='2y', start=None):
+        if not symbols:
+            return {}
+        try:
+            data = self._download(list(symbols), period, start)
+        except Exception as e:
+            print(f"  ! Batch download failed ({str(e)[:60]}), fetching per ticker")
+            return super().fetch(symbols, period, start)
+        closes = {}
+        for symbol in symbols:
+            if data.empty or symbol not in data.columns.get_level_values(0):
+                continue
+            series = _close_column(data[symbol])
+            if not series.empty:
+                closes[symbol] = series
+        return closes
+
+
+class FileDataSource(DataSource):
+    """Reads <directory>/<symbol>.csv files with Date and Close columns, e.g. for tests or offline demos."""
+
+    def __init__(self, directory, max_workers=8, timeout=20.0):
+        self.directory = Path(directory)
+        self.max_workers, self.timeout = max_workers, timeout
+
+    def fetch_one(self, symbol, period='2y', start=None):
+        path = self.directory / f"{symbol}.csv"
+        if not path.exists():
+            return None
+        frame = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+        closes = _close_column(frame)
+        if start is not None:
+            return closes[closes.index >= pd.Timestamp(start)]
+        offset = period_offset(period)
+        return closes if offset is None or closes.empty else closes[closes.index >= closes.index[-1] - offset]
+
+
+def _default_source():
+    spec = os.environ.get('QPO_DATA_SOURCE', 'yahoo')
+    if spec.startswith('file:'):
+        return FileDataSource(spec[len('file:'):])
+    return YahooDataSource()
+
+
+data_source = _default_source()
+
+
+def set_data_source(source):
+    """Swap the process-wide data source (e.g. a FileDataSource in tests)."""
+    global data_source
+    data_source = source
+
+
+def get_data_source():
+    return data_source
@@ -0,0 +1,71 @@
+import os
+import time
+import numpy as np
+from math import comb
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from classical import BRUTE_FORCE_LIMIT, brute_force_search, branch_and_bound_search
+from heuristics import simulated_annealing
+from qaoa import optimize_qaoa, qubo_to_ising
+
+FRONTIER_SOLVERS = ('exact', 'heuristic', 'qaoa')
+
+
+def lambda_grid(lambdas=None, start=0.0, stop=1.0, steps=11):
+    """Sorted, de-duplicated lambda values: the explicit list if given, else an even grid."""
+    values = np.linspace(start, stop, steps) if lambdas is None else np.asarray(lambdas, dtype=float)
+    return sorted({round(float(v), 10) for v in values})
+
+
+def solve_point(lambda_param, Q0, Q1, returns, covariance, k, solver, groups=None, time_limit=None,
+                qaoa_options=None):
+    """Solve the QUBO Q0 + lambda * Q1 single-process with one of FRONTIER_SOLVERS."""
+    Q = Q0 + lambda_param * Q1
+    start = time.time()
+    if solver == 'exact':
+        if comb(Q.shape[0], k) <= BRUTE_FORCE_LIMIT:
+            result, name = brute_force_search(Q, k, workers=1), 'brute_force'
+        else:
+            result, name = branch_and_bound_search(Q, k, groups=groups, time_limit=time_limit), 'branch_and_bound'
+    elif solver == 'heuristic':
+        result, name = simulated_annealing(Q, k), 'simulated_annealing'
+    else:
+        h, J, offset = qubo_to_ising(Q)
+        result = optimize_qaoa(returns, covariance, k, lambda_param=lambda_param, qubo=(Q, h, J, offset),
+                               **(qaoa_options or {}))
+        name = 'qaoa'
+    return {'lambda': lambda_param, 'selected_indices': result['selected_indices'],
+            'optimal_cost': float(result['optimal_cost']), 'solver': name,
+            'computation_time': result.get('computation_time', time.time() - start), 'proven_optimal': result.get('proven_optimal', name == 'brute_force')}
+
+
+def solve_frontier(returns, covariance, k, lambdas, Q0, Q1, solver='exact', sector_indices=None,
+                   time_limit=None, qaoa_options=None, workers=None, progress=None):
+    """Solve min x @ (Q0 + lambda * Q1) @ x with exactly k ones for every lambda.
+
+    Points are independent, so they are spread over a process pool (each point
+    solves single-process), except chunked QAOA, which solves them one at a time. `progress(stage, **fields)` is called as points finish.
+    Returns one dict per lambda, in lambda order.
+    """
+    groups = list(sector_indices.values()) if sector_indices else None
+    run = partial(solve_point, Q0=Q0, Q1=Q1, returns=returns, covariance=covariance, k=k, solver=solver,
+                  groups=groups, time_limit=time_limit, qaoa_options=qaoa_options)
+    workers = min(workers or os.cpu_count() or 1, len(lambdas))
+    if solver == 'qaoa' and (qaoa_options or {}).get('mode') == 'chunked':
+        workers = 1  # every point process would hold its own 2^n state buffer
+
+    points = {}
+    if workers <= 1:
+        for lam in lambdas:
+            points[lam] = run(lam)
+            if progress is not None:
+                progress('frontier', solved=len(points), total=len(lambdas), **{'lambda': lam})
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run, lam): lam for lam in lambdas}
+            for future in as_completed(futures):
+                points[futures[future]] = future.result()
+                if progress is not None:
+                    progress('frontier', solved=len(points), total=len(lambdas), **{'lambda': futures[future]})
+    return [points[lam] for lam in lambdas]
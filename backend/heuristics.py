@@ -0,0 +1,145 @@
+import time
+import numpy as np
+from math import comb
+
+SA_RESTARTS = 16
+SA_SWEEPS = 100
+TABU_RESTARTS = 8
+TABU_MAX_ITERATIONS = 2000
+
+
+def _couplings(Q):
+    Q = np.asarray(Q, dtype=float)
+    W = Q + Q.T
+    W[np.diag_indices(Q.shape[0])] = 0.0
+    return Q, np.diag(Q).copy(), W
+
+
+def _random_starts(rng, restarts, n, k):
+    """`restarts` random k-subsets as (inside, outside) index arrays."""
+    perm = np.argsort(rng.random((restarts, n)), axis=1)
+    return perm[:, :k].copy(), perm[:, k:].copy()
+
+
+def _fields(d, W, inside):
+    x = np.zeros((len(inside), len(d)))
+    np.put_along_axis(x, inside, 1.0, axis=1)
+    return d + x @ W
+
+
+def _result(Q, k, inside, method, restarts, moves, start_time):
+    n = Q.shape[0]
+    costs = [float(Q[np.ix_(sel, sel)].sum()) for sel in inside]
+    best = sorted(inside[int(np.argmin(costs))].tolist())
+    elapsed = time.time() - start_time
+    return {
+        'selected_indices': best,
+        'optimal_bitstring': ''.join('1' if i in best else '0' for i in range(n)),
+        'optimal_cost': min(costs),
+        'total_combinations': comb(n, k),
+        'computation_time': elapsed,
+        'moves_per_second': moves / elapsed if elapsed > 0 else None,
+        'method': method,
+        'restarts': restarts,
+        'moves_evaluated': moves
+    }
+
+
+def simulated_annealing(Q, k, restarts=SA_RESTARTS, sweeps=SA_SWEEPS, seed=42, progress=None):
+    """Minimize x @ Q @ x over x with exactly k ones by swap-move annealing.
+
+    All restarts advance together: each step proposes one random swap (i out,
+    j in) per restart. Keeping F = diag(Q) + W @ x with W = Q + Q.T (zero
+    diagonal), the swap changes the cost by F[j] - F[i] - W[i, j], and an
+    accepted swap updates F in O(n). The temperature falls geometrically from
+    the typical move size to 1e-4 of it over `sweeps` * n steps.
+    `progress(stage, **fields)` is called once per sweep.
+    """
+    Q, d, W = _couplings(Q)
+    n = Q.shape[0]
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    inside, outside = _random_starts(rng, restarts, n, k)
+    if k in (0, n):
+        return _result(Q, k, inside[:1], 'simulated_annealing', restarts, 0, start_time)
+
+    F = _fields(d, W, inside)
+    cost = 0.5 * (np.take_along_axis(F, inside, axis=1) + d[inside]).sum(axis=1)
+    best_cost, best_inside = cost.copy(), inside.copy()
+    rows = np.arange(restarts)
+
+    def propose():
+        a, b = rng.integers(0, k, restarts), rng.integers(0, n - k, restarts)
+        i, j = inside[rows, a], outside[rows, b]
+        return a, b, i, j, F[rows, j] - F[rows, i] - W[i, j]
+
+    t0 = np.median(np.abs(propose()[-1])) or 1.0
+    steps = sweeps * n
+    temperatures = np.geomspace(t0, t0 * 1e-4, steps)
+    for step, temperature in enumerate(temperatures):
+        a, b, i, j, delta = propose()
+        accept = (delta <= 0) | (rng.random(restarts) < np.exp(-np.maximum(delta, 0) / temperature))
+        if accept.any():
+            r = rows[accept]
+            F[r] += W[j[accept]] - W[i[accept]]
+            inside[r, a[accept]], outside[r, b[accept]] = j[accept], i[accept]
+            cost[r] += delta[accept]
+            improved = cost < best_cost
+            best_cost[improved], best_inside[improved] = cost[improved], inside[improved]
+        if progress is not None and (step + 1) % n == 0:
+            progress('heuristic', method='simulated_annealing', sweep=(step + 1) // n, sweeps=sweeps,
+                     best_cost=float(best_cost.min()))
+    return _result(Q, k, best_inside, 'simulated_annealing', restarts, steps * restarts, start_time)
+
+
+def tabu_search(Q, k, restarts=TABU_RESTARTS, iterations=None, tenure=None, seed=42, progress=None):
+    """Minimize x @ Q @ x over x with exactly k ones by swap-move tabu search.
+
+    Every iteration scores all k * (n - k) swaps of every restart at once from
+    the maintained field F (see simulated_annealing) and takes the best one
+    that does not move a recently moved asset, unless it beats the restart's
+    best (aspiration). Moved assets stay tabu for `tenure` iterations.
+    `progress(stage, **fields)` is called every n iterations.
+    """
+    Q, d, W = _couplings(Q)
+    n = Q.shape[0]
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    inside, outside = _random_starts(rng, restarts, n, k)
+    if k in (0, n):
+        return _result(Q, k, inside[:1], 'tabu', restarts, 0, start_time)
+
+    iterations = iterations or min(20 * n, TABU_MAX_ITERATIONS)
+    tenure = tenure or max(1, min(k, n - k) // 4 + 1)
+    F = _fields(d, W, inside)
+    cost = 0.5 * (np.take_along_axis(F, inside, axis=1) + d[inside]).sum(axis=1)
+    best_cost, best_inside = cost.copy(), inside.copy()
+    tabu_until = np.zeros((restarts, n), dtype=np.int64)
+    rows = np.arange(restarts)
+
+    for it in range(iterations):
+        f_in, f_out = np.take_along_axis(F, inside, axis=1), np.take_along_axis(F, outside, axis=1)
+        delta = f_out[:, None, :] - f_in[:, :, None] - W[inside[:, :, None], outside[:, None, :]]
+        tabu = ((np.take_along_axis(tabu_until, inside, axis=1) > it)[:, :, None]
+                | (np.take_along_axis(tabu_until, outside, axis=1) > it)[:, None, :])
+        aspiration = cost[:, None, None] + delta < best_cost[:, None, None]
+        delta = np.where(tabu & ~aspiration, np.inf, delta).reshape(restarts, -1)
+        move = np.argmin(delta, axis=1)
+        delta = delta[rows, move]
+        movable = np.isfinite(delta)
+        a, b = np.divmod(move, n - k)
+        r, a, b = rows[movable], a[movable], b[movable]
+        i, j = inside[r, a], outside[r, b]
+        F[r] += W[j] - W[i]
+        inside[r, a], outside[r, b] = j, i
+        cost[r] += delta[movable]
+        tabu_until[r, i] = tabu_until[r, j] = it + tenure
+        improved = cost < best_cost
+        best_cost[improved], best_inside[improved] = cost[improved], inside[improved]
+        if progress is not None and (it + 1) % n == 0:
+            progress('heuristic', method='tabu', iteration=it + 1, iterations=iterations,
+                     best_cost=float(best_cost.min()))
+    return _result(Q, k, best_inside, 'tabu', restarts, iterations * restarts * k * (n - k), start_time)
+
+
+HEURISTICS = {'simulated_annealing': simulated_annealing, 'tabu': tabu_search}
@@ -0,0 +1,237 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+
+from tracing import metrics
+
+JOB_WORKERS = int(os.environ.get('QPO_JOB_WORKERS', 2))
+JOB_QUEUE = int(os.environ.get('QPO_JOB_QUEUE', 8))
+JOB_RETENTION = float(os.environ.get('QPO_JOB_RETENTION', 3600))
+JOB_MAX_EVENTS = int(os.environ.get('QPO_JOB_MAX_EVENTS', 2000))
+PROGRESS_INTERVAL = float(os.environ.get('QPO_PROGRESS_INTERVAL', 0.25))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobProgress:
+    """Progress callback handed to solvers running inside a job worker.
+
+    Each call merges its fields into the job's progress under `stage`. Solvers
+    report on every objective evaluation, so the shared dict and event log (for
+    streaming) are only written once per PROGRESS_INTERVAL, or at once for a new
+    stage; the event log keeps the latest JOB_MAX_EVENTS events. Publishing
+    raises JobCancelled once the job has been cancelled, and calls return True
+    once an early stop has been requested so the solver can wrap up.
+    """
+
+    def __init__(self, shared, events):
+        self.shared, self.events = shared, events
+        self.stages, self.dirty = {}, set()
+        self.event = None
+        self.stop = False
+        self.published = 0.0
+        self.logged = self.trimmed = 0
+
+    def __call__(self, stage, **fields):
+        now = time.time()
+        new = stage not in self.stages
+        self.stages[stage] = {**self.stages.get(stage, {}), **fields, 'updated_at': now}
+        self.dirty.add(stage)
+        self.event = {'stage': stage, **fields, 'time': now}
+        if new or now - self.published >= PROGRESS_INTERVAL:
+            if self.shared.get('cancelled'):
+                raise JobCancelled()
+            self.publish()
+            self.stop = bool(self.shared.get('stop'))
+        return self.stop
+
+    def publish(self):
+        """Write the stages and the latest event held back since the last publish."""
+        if self.dirty:
+            self.shared.update({stage: self.stages[stage] for stage in self.dirty})
+            self.dirty.clear()
+        if self.event is not None:
+            self.events.append(self.event)
+            self.event = None
+            self.logged += 1
+            # Drop the oldest half once full; readers index past them via 'events_trimmed'
+            if self.logged - self.trimmed > JOB_MAX_EVENTS:
+                drop = JOB_MAX_EVENTS // 2
+                self.trimmed += drop
+                self.shared['events_trimmed'] = self.trimmed
+                del self.events[:drop]
+        self.published = time.time()
+
+
+def _run_job(fn, args, shared, events):
+    # The pool may hand over a job before cancel() reaches it, so re-check here
+    if shared.get('cancelled'):
+        raise JobCancelled()
+    shared['started_at'] = time.time()
+    progress = JobProgress(shared, events)
+    result = fn(*args, progress=progress)
+    progress.publish()
+    return result
+
+
+def _warm_worker(barrier, timeout=60):
+    try:
+        barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+    return os.getpid()
+
+
+class JobManager:
+    """Runs long optimizations on a process pool with a bounded queue.
+
+    At most `workers` jobs run at once and at most `max_queued` more wait;
+    submit() raises JobQueueFull beyond that so callers can apply backpressure.
+    Finished jobs are kept for `retention` seconds.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_QUEUE, retention=JOB_RETENTION):
+        self.workers, self.max_queued, self.retention = workers, max_queued, retention
+        self._pool = None
+        self._manager = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _ensure_started(self, initializer=None):
+        if self._pool is None:
+            self._manager = multiprocessing.Manager()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=initializer)
+
+    def start(self, initializer=None):
+        """Start the pool now rather than on the first submit, running `initializer` in every worker.
+
+        Returns the number of worker processes that answered.
+        """
+        with self._lock:
+            self._ensure_started(initializer)
+            # The pool forks workers lazily; a barrier keeps each task busy until all of them run at once
+            barrier = self._manager.Barrier(self.workers)
+            futures = [self._pool.submit(_warm_worker, barrier) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def _active(self):
+        return sum(1 for job in self._jobs.values() if not job['future'].done())
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j for j, job in self._jobs.items()
+                       if job['future'].done() and job['finished_at'] and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, fn, *args):
+        """Queue fn(*args, progress=...) and return the new job id."""
+        with self._lock:
+            self._prune()
+            if self._active() >= self.workers + self.max_queued:
+                raise JobQueueFull(f"{self._active()} jobs already queued or running")
+            self._ensure_started()
+            job_id = uuid.uuid4().hex
+            shared, events = self._manager.dict(), self._manager.list()
+            future = self._pool.submit(_run_job, fn, args, shared, events)
+            job = {'id': job_id, 'future': future, 'shared': shared, 'events': events,
+                   'created_at': time.time(), 'finished_at': None}
+            self._jobs[job_id] = job
+        future.add_done_callback(lambda f: self._finished(job, f))
+        return job_id
+
+    def _finished(self, job, future):
+        job['finished_at'] = time.time()
+        # Stages ran in the worker process, so fold its trace into this process's /metrics
+        if not future.cancelled() and future.exception() is None and isinstance(future.result(), dict):
+            metrics.observe_report(future.result().get('timings', {}))
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or flag a running one to stop at its next progress report."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if not job['future'].cancel() and not job['future'].done():
+            job['shared']['cancelled'] = True
+        return self.status(job_id)
+
+    def stop(self, job_id):
+        """Ask a running job to finish early with its best result so far."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if not job['future'].done():
+            job['shared']['stop'] = True
+        return self.status(job_id)
+
+    def events(self, job_id, cursor=0):
+        """Progress events recorded since `cursor` (a count of events already read), and the next cursor.
+
+        Events trimmed from the log before they were read are skipped.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        try:
+            trimmed = job['shared'].get('events_trimmed', 0)
+            batch = job['events'][max(cursor - trimmed, 0):]
+        except (EOFError, OSError, BrokenPipeError):
+            return [], cursor
+        return batch, max(cursor, trimmed) + len(batch)
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        future = job['future']
+        try:
+            shared = dict(job['shared'])
+        except (EOFError, OSError, BrokenPipeError):
+            shared = {}
+        info = {'job_id': job_id, 'created_at': job['created_at'], 'started_at': shared.pop('started_at', None),
+                'finished_at': job['finished_at'],
+                'progress': {k: v for k, v in shared.items() if k not in ('cancelled', 'stop', 'events_trimmed')}}
+
+        if future.cancelled():
+            info['status'] = 'cancelled'
+        elif not future.done():
+            info['status'] = 'running' if info['started_at'] else 'queued'
+            if shared.get('cancelled'):
+                info['status'] = 'cancelling'
+        else:
+            try:
+                info['result'] = future.result()
+                info['status'] = 'completed'
+            except (JobCancelled, CancelledError):
+                info['status'] = 'cancelled'
+            except Exception as e:
+                info['status'] = 'failed'
+                info['error'] = str(e)
+        return info
+
+    def stats(self):
+        with self._lock:
+            states = [self.status(job_id)['status'] for job_id in self._jobs]
+        return {'workers': self.workers, 'max_queued': self.max_queued,
+                **{state: states.count(state) for state in set(states)}}
+
+    def shutdown(self):
+        if self._pool is not None:
+            for job in self._jobs.values():
+                job['future'].cancel()
+                if not job['future'].done():
+                    job['shared']['cancelled'] = True
+            self._pool.shutdown(wait=True)
+            self._manager.shutdown()
+            self._pool = self._manager = None
+
+
+job_manager = JobManager()
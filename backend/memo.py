@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+from stocks import calculate_returns_and_cov
+from qaoa import build_qubo_matrix, build_qubo_parts, qubo_to_ising
+
+
+class LRUCache:
+    """Small thread-safe LRU with hit/miss counters."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+returns_cache = LRUCache(maxsize=64)
+qubo_cache = LRUCache(maxsize=256)
+
+
+def _frozen(*arrays):
+    # Cached arrays are shared between requests, so make accidental in-place edits fail loudly
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
+
+
+def data_version(prices):
+    """Content hash of a price frame (dates + values), so refreshed data never hits stale entries."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(prices.index.values.astype('datetime64[ns]').tobytes())
+    digest.update(np.ascontiguousarray(prices.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def returns_key(prices, period='2y'):
+    """Key of a price frame's returns/covariance; also the data_key the QUBO memos build on."""
+    return (tuple(prices.columns), period, data_version(prices))
+
+
+def cached_returns_and_cov(prices, period='2y'):
+    """Memoized calculate_returns_and_cov. Returns (returns, covariance, data_key)."""
+    data_key = returns_key(prices, period)
+    returns, covariance = returns_cache.get_or_compute(
+        data_key, lambda: _frozen(*calculate_returns_and_cov(prices)))
+    return returns, covariance, data_key
+
+
+def cached_qubo(data_key, returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
+    """Memoized (Q, h, J, offset) for one problem, shared by the classical and QAOA solvers."""
+    sectors = None if not sector_indices else tuple(sorted((name, tuple(idx)) for name, idx in sector_indices.items()))
+    key = (data_key, k, float(lambda_param), sectors, max_per_sector if sectors else None)
+
+    def build():
+        Q = build_qubo_matrix(returns, covariance, k, lambda_param, sector_indices, max_per_sector)
+        h, J, offset = qubo_to_ising(Q)
+        return _frozen(Q, h, J) + (offset,)
+    return qubo_cache.get_or_compute(key, build)
+
+
+def cached_qubo_parts(data_key, returns, covariance, k, sector_indices=None, max_per_sector=1):
+    """Memoized (Q0, Q1) from build_qubo_parts, shared by every point of a lambda sweep."""
+    sectors = None if not sector_indices else tuple(sorted((name, tuple(idx)) for name, idx in sector_indices.items()))
+    key = ('parts', data_key, k, sectors, max_per_sector if sectors else None)
+    return qubo_cache.get_or_compute(
+        key, lambda: _frozen(*build_qubo_parts(returns, covariance, k, sector_indices, max_per_sector)))
+
+
+def cache_stats():
+    return {'returns': returns_cache.stats(), 'qubo': qubo_cache.stats()}
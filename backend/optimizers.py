@@ -0,0 +1,147 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+OPTIMIZERS = ('cobyla', 'spsa', 'l-bfgs-b')
+PLATEAU_TOL = 1e-6
+STOP_POLL = 0.5  # seconds between should_stop() checks while pool starts are running
+
+_stop_event = None  # set in run_starts pool workers; once set, every running start stops at its next evaluation
+
+
+class StopOptimization(Exception):
+    """Raised from the objective to end the optimizer loop early; `reason` says why."""
+
+    def __init__(self, reason='stopped'):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TrackedObjective:
+    """Objective wrapper that keeps the best point seen and ends the run early.
+
+    `on_evaluation(evaluations, energy, params)` returning True stops with reason
+    'stopped'; `plateau` evaluations without a relative improvement above
+    PLATEAU_TOL stop with 'plateau'; passing the `deadline` (a time.time()
+    value) stops with 'time_budget'. Inside a run_starts pool, a stop of the
+    whole run also ends the start with 'stopped'.
+    """
+
+    def __init__(self, objective, on_evaluation=None, plateau=None, deadline=None):
+        self.objective, self.on_evaluation = objective, on_evaluation
+        self.plateau, self.deadline = plateau, deadline
+        self.evaluations = self.last_improvement = 0
+        self.best_energy, self.best_params = float('inf'), None
+
+    def __call__(self, params):
+        energy = float(self.objective(params))
+        self.evaluations += 1
+        if energy < self.best_energy:
+            if energy < self.best_energy - PLATEAU_TOL * max(1.0, abs(self.best_energy)):
+                self.last_improvement = self.evaluations
+            self.best_energy, self.best_params = energy, np.array(params)
+        if self.on_evaluation is not None and self.on_evaluation(self.evaluations, energy, params):
+            raise StopOptimization('stopped')
+        if _stop_event is not None and _stop_event.is_set():
+            raise StopOptimization('stopped')
+        if self.plateau and self.evaluations - self.last_improvement >= self.plateau:
+            raise StopOptimization('plateau')
+        if self.deadline is not None and time.time() > self.deadline:
+            raise StopOptimization('time_budget')
+        return energy
+
+
+def spsa(fun, x0, maxiter=100, seed=42, step=0.2, perturbation=0.1):
+    """Simultaneous-perturbation stochastic approximation with the standard gain decay.
+
+    Uses two evaluations per iteration (maxiter counts evaluations, like COBYLA).
+    The step gain is calibrated so the first update moves about `step` radians.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.array(x0, dtype=float)
+    alpha, gamma, A = 0.602, 0.101, max(1, maxiter // 20)
+
+    def gradient(ck):
+        delta = rng.choice([-1.0, 1.0], size=len(x))
+        return (fun(x + ck * delta) - fun(x - ck * delta)) / (2 * ck) * delta
+
+    magnitude = np.mean(np.abs(gradient(perturbation))) or 1.0
+    a = step * (A + 1) ** alpha / magnitude
+    for it in range((maxiter - 3) // 2):
+        x = x - a / (it + 1 + A) ** alpha * gradient(perturbation / (it + 1) ** gamma)
+    fun(x)
+    return x
+
+
+def run_optimizer(tracked, x0, method='cobyla', maxiter=50, gradient=None, seed=42, rhobeg=None):
+    """Minimize a TrackedObjective from x0; returns the reason it stopped early, or None."""
+    if method not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer '{method}'")
+    if method in ('cobyla', 'l-bfgs-b'):
+        from scipy.optimize import minimize
+    try:
+        if method == 'cobyla':
+            options = {'maxiter': maxiter, **({'rhobeg': rhobeg} if rhobeg else {})}
+            minimize(tracked, x0, method='COBYLA', options=options)
+        elif method == 'l-bfgs-b':
+            if gradient is None:
+                raise ValueError("l-bfgs-b needs an analytic gradient (exact mode)")
+            minimize(tracked, x0, jac=gradient, method='L-BFGS-B', options={'maxiter': maxiter, 'maxfun': maxiter})
+        else:
+            spsa(tracked, x0, maxiter, seed)
+    except StopOptimization as e:
+        return e.reason
+    return None
+
+
+def run_starts(worker, initial_points, workers=None, on_result=None, should_stop=None):
+    """Run worker(x0) for every initial point on a process pool.
+
+    `worker` must be picklable (a module-level function or a partial of one)
+    and accept an `on_evaluation` keyword for its TrackedObjective.
+    on_result(index, result) is called as starts finish, and should_stop() every
+    STOP_POLL seconds while they run (every evaluation on a single worker). When
+    either returns True the starts that have not begun are cancelled and the
+    running ones stop at their next evaluation (through a shared event) and are
+    still collected. Returns {index: result}.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(initial_points))
+    results = {}
+    if workers <= 1:
+        on_evaluation = (lambda *_: should_stop()) if should_stop is not None else None
+        for i, x0 in enumerate(initial_points):
+            results[i] = worker(x0, on_evaluation=on_evaluation)
+            if on_result is not None and on_result(i, results[i]):
+                break
+            if should_stop is not None and should_stop():
+                break
+        return results
+
+    stop = multiprocessing.Event()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_set_stop_event, initargs=(stop,))
+    try:
+        futures = {pool.submit(worker, x0): i for i, x0 in enumerate(initial_points)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=STOP_POLL, return_when=FIRST_COMPLETED)
+            halt = False
+            for future in done:
+                if not future.cancelled():
+                    i = futures[future]
+                    results[i] = future.result()
+                    halt = (on_result is not None and on_result(i, results[i])) or halt
+            if not stop.is_set() and (halt or (should_stop is not None and should_stop())):
+                stop.set()
+                for future in pending:
+                    future.cancel()
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _set_stop_event(event):
+    global _stop_event
+    _stop_event = event
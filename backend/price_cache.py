@@ -0,0 +1,136 @@
+import os
+import re
+import time
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get('QPO_CACHE_DIR', Path(__file__).parent / '.cache' / 'prices'))
+CACHE_TTL = float(os.environ.get('QPO_CACHE_TTL', 6 * 3600))
+OFFLINE = os.environ.get('QPO_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+_PERIOD_UNITS = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+
+def period_offset(period):
+    """Translate a yfinance period string ('5d', '6mo', '2y') to a DateOffset, None for 'max'."""
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    return pd.DateOffset(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))}) if match else None
+
+
+class PriceCache:
+    """Columnar on-disk close-price cache keyed by (ticker, period).
+
+    Each entry is one .npz holding the dates (int64 ns), closes (float64) and
+    last refresh time. It is written to a unique temporary file and swapped in
+    with a single rename, so concurrent writers (threads or worker processes)
+    never collide and readers always see dates and closes from the same write.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.hits = self.misses = self.refreshes = self.stale = 0
+        self._lock = threading.Lock()
+
+    def _base(self, ticker, period):
+        return self.directory / f"{re.sub(r'[^A-Za-z0-9_-]', '_', ticker)}__{period}"
+
+    def load(self, ticker, period):
+        """Return (series, age_seconds) for a cached entry, or (None, None) if never cached."""
+        base = self._base(ticker, period)
+        try:
+            with np.load(base.with_suffix('.npz')) as entry:
+                dates, closes, fetched_at = entry['dates'], entry['close'], float(entry['fetched_at'])
+        except (OSError, ValueError, KeyError):
+            return None, None
+        series = pd.Series(closes, index=pd.DatetimeIndex(dates), name=ticker)
+        return series, time.time() - fetched_at
+
+    def store(self, ticker, period, series):
+        """Write (or overwrite) an entry, trimmed to the period window."""
+        series = series.dropna().sort_index()
+        series = series[~series.index.duplicated(keep='last')]
+        offset = period_offset(period)
+        if offset is not None and len(series):
+            series = series[series.index >= series.index[-1] - offset]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self._base(ticker, period)
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=base.name, suffix='.tmp', delete=False) as f:
+            np.savez(f, dates=series.index.values.astype('datetime64[ns]').astype(np.int64),
+                     close=series.values.astype(np.float64), fetched_at=time.time())
+        try:
+            os.replace(f.name, base.with_suffix('.npz'))
+        except OSError:
+            os.unlink(f.name)
+            raise
+        return series
+
+    def get_many(self, symbols, period, fetch, offline=OFFLINE):
+        """Serve closes for {ticker: symbol}, refreshing through fetch(symbols, period, start) when stale.
+
+        Fresh entries are hits. Stale entries are refreshed together in one call
+        that only asks for the missing tail of dates; never-cached tickers are
+        fetched together in a second call. Offline, or when a refresh fails,
+        stale data is served as-is. Tickers that were never cached and cannot
+        be fetched are left out of the result.
+        """
+        results, stale, missing = {}, {}, []
+        for ticker in symbols:
+            cached, age = self.load(ticker, period)
+            if cached is not None and (age < self.ttl or offline):
+                with self._lock:
+                    self.hits += 1
+                    self.stale += age >= self.ttl
+                results[ticker] = cached
+            elif cached is not None and len(cached):
+                stale[ticker] = cached
+            else:
+                missing.append(ticker)
+        if offline:
+            with self._lock:
+                self.misses += len(missing)
+            return results
+
+        if stale:
+            start = min(cached.index[-1] for cached in stale.values()) + pd.Timedelta(days=1)
+            try:
+                tails = fetch([symbols[t] for t in stale], period, start)
+            except Exception as e:
+                print(f"  ! Refresh failed ({str(e)[:60]}), serving cached data")
+                tails = None
+            with self._lock:
+                if tails is None:
+                    self.stale += len(stale)
+                else:
+                    self.refreshes += len(stale)
+            for ticker, cached in stale.items():
+                tail = None if tails is None else tails.get(symbols[ticker])
+                # Tails share the earliest start date, so overlapping rows are de-duplicated on store
+                merged = cached if tail is None or tail.empty else pd.concat([cached, tail])
+                results[ticker] = cached if tails is None else self.store(ticker, period, merged)
+
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            try:
+                fetched = fetch([symbols[t] for t in missing], period, None)
+            except Exception as e:
+                print(f"  x Download failed: {str(e)[:60]}")
+                fetched = {}
+            for ticker in missing:
+                series = fetched.get(symbols[ticker])
+                if series is not None and not series.empty:
+                    results[ticker] = self.store(ticker, period, series)
+        return results
+
+    def stats(self):
+        return {'directory': str(self.directory), 'ttl_seconds': self.ttl, 'offline': OFFLINE,
+                'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes,
+                'stale_served': self.stale}
+
+
+price_cache = PriceCache()
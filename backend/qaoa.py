@@ -1,67 +1,35 @@
 import time
 import numpy as np
-from itertools import combinations
-from scipy.optimize import minimize
-from qiskit import QuantumCircuit
-from qiskit.primitives import StatevectorSampler
-from qiskit.quantum_info import SparsePauliOp
+from functools import lru_cache, partial
 
+from classical import brute_force_search, branch_and_bound_search
+from heuristics import HEURISTICS
+from warmstart import angle_store, problem_features, WARM_RHOBEG
+from tracing import traced, stage, count as count_event
+from optimizers import OPTIMIZERS, TrackedObjective, run_optimizer, run_starts
+from statevector import (cost_diagonal, expectation, expectation_gradient, qaoa_state, sample_outcomes, packed_to_masks,
+                         feasible_states, subspace_costs, xy_edges, xy_pairs, xy_expectation,
+                         xy_expectation_gradient, xy_qaoa_state, ChunkedStatevector, STATE_DIR)
 
-<<<<<<< Updated upstream
-def build_qubo_matrix(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
-    """Build the QUBO matrix for portfolio optimization."""
-=======
-def classical_brute_force(returns, covariance, k, lambda_param=0.5):
-    """
-    Classical brute-force solver: evaluates ALL C(n,k) combinations
-    using the same QUBO matrix as QAOA for a fair comparison.
-    """
-    n = len(returns)
-    Q = build_qubo_matrix(returns, covariance, k, lambda_param)
-
-    start_time = time.time()
-
-    best_cost = float('inf')
-    best_indices = None
-    total_combinations = 0
-
-    for combo in combinations(range(n), k):
-        x = np.zeros(n)
-        for i in combo:
-            x[i] = 1.0
-        cost = x @ Q @ x
-        total_combinations += 1
-        if cost < best_cost:
-            best_cost = cost
-            best_indices = list(combo)
+TEMPLATE_CACHE_SIZE = 32
+QAOA_MODES = ('exact', 'sampler', 'chunked')
+MIXERS = ('x', 'xy_ring', 'xy_complete')
+PRECISIONS = ('complex128', 'complex64')
 
-    elapsed = time.time() - start_time
 
-    best_bitstring = ''.join('1' if i in best_indices else '0' for i in range(n))
-
-    return {
-        'selected_indices': best_indices,
-        'optimal_bitstring': best_bitstring,
-        'optimal_cost': float(best_cost),
-        'total_combinations': total_combinations,
-        'computation_time': elapsed
-    }
-
-
-def build_qubo_matrix(returns, covariance, k, lambda_param=0.5):
->>>>>>> Stashed changes
+@traced('qubo')
+def build_qubo_matrix(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
+    """Build the QUBO matrix for portfolio optimization."""
     n = len(returns)
+    returns, covariance = np.asarray(returns, dtype=float), np.asarray(covariance, dtype=float)
     penalty = max(10.0, 2.0 * max(np.max(np.abs(covariance)), np.max(np.abs(returns))) * n)
     Q = np.zeros((n, n))
+    upper = np.triu_indices(n, 1)
 
     # Diagonal: return + risk + cardinality constraint
-    for i in range(n):
-        Q[i, i] = lambda_param * covariance[i, i] - (1 - lambda_param) * returns[i] + penalty * (1 - 2 * k)
-
+    Q[np.diag_indices(n)] = lambda_param * np.diag(covariance) - (1 - lambda_param) * returns + penalty * (1 - 2 * k)
     # Off-diagonal: risk covariance + cardinality
-    for i in range(n):
-        for j in range(i + 1, n):
-            Q[i, j] = 2.0 * (lambda_param * covariance[i, j] + penalty)
+    Q[upper] = 2.0 * (lambda_param * covariance[upper] + penalty)
 
     # Sector diversification constraint (NOVEL CONTRIBUTION)
     if sector_indices:
@@ -69,147 +37,364 @@ def build_qubo_matrix(returns, covariance, k, lambda_param=0.5):
         for sector_name, indices in sector_indices.items():
             if len(indices) <= max_per_sector:
                 continue
-            m = max_per_sector
-            for i in indices:
-                Q[i, i] += sector_penalty * (1 - 2 * m)
-            for idx_a in range(len(indices)):
-                for idx_b in range(idx_a + 1, len(indices)):
-                    i, j = indices[idx_a], indices[idx_b]
-                    if i < j:
-                        Q[i, j] += 2.0 * sector_penalty
-                    else:
-                        Q[j, i] += 2.0 * sector_penalty
+            members = np.zeros(n, dtype=bool)
+            members[indices] = True
+            Q[indices, indices] += sector_penalty * (1 - 2 * max_per_sector)
+            Q[np.triu(np.outer(members, members), 1)] += 2.0 * sector_penalty
     return Q
 
 
-def classical_brute_force(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1):
-    """Evaluate ALL C(n,k) combinations using the same QUBO matrix as QAOA."""
-    n = len(returns)
-    Q = build_qubo_matrix(returns, covariance, k, lambda_param, sector_indices, max_per_sector)
-    start_time = time.time()
-    best_cost, best_indices, total = float('inf'), None, 0
-
-    for combo in combinations(range(n), k):
-        x = np.zeros(n)
-        for i in combo:
-            x[i] = 1.0
-        cost = x @ Q @ x
-        total += 1
-        if cost < best_cost:
-            best_cost = cost
-            best_indices = list(combo)
-
-    return {
-        'selected_indices': best_indices,
-        'optimal_bitstring': ''.join('1' if i in best_indices else '0' for i in range(n)),
-        'optimal_cost': float(best_cost),
-        'total_combinations': total,
-        'computation_time': time.time() - start_time
-    }
-
+def build_qubo_parts(returns, covariance, k, sector_indices=None, max_per_sector=1):
+    """(Q0, Q1) with build_qubo_matrix(..., lambda_param) == Q0 + lambda_param * Q1 (up to rounding).
 
+    Only the risk/return weighting depends on lambda; the penalties live in Q0,
+    so a lambda sweep builds the matrix once and rescales one term per point.
+    """
+    covariance = np.asarray(covariance, dtype=float)
+    Q0 = build_qubo_matrix(returns, covariance, k, 0.0, sector_indices, max_per_sector)
+    Q1 = 2.0 * np.triu(covariance, 1)
+    Q1[np.diag_indices(len(returns))] = np.diag(covariance) + np.asarray(returns, dtype=float)
+    return Q0, Q1
+
+
+@traced('brute_force')
+def classical_brute_force(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1,
+                          workers=None, qubo=None, progress=None):
+    """Evaluate ALL C(n,k) combinations using the same QUBO matrix as QAOA.
+    Pass a prebuilt (Q, h, J, offset) as `qubo` to skip rebuilding it."""
+    Q = qubo[0] if qubo is not None else build_qubo_matrix(returns, covariance, k, lambda_param,
+                                                           sector_indices, max_per_sector)
+    return brute_force_search(Q, k, workers=workers, progress=progress)
+
+
+@traced('branch_and_bound')
+def classical_branch_and_bound(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1,
+                               qubo=None, progress=None, time_limit=None):
+    """Exact optimum of the same QUBO by branch-and-bound, for universes too large to enumerate.
+    Sectors (when given) are used as bound groups so sector-concentrated branches are pruned early."""
+    Q = qubo[0] if qubo is not None else build_qubo_matrix(returns, covariance, k, lambda_param,
+                                                           sector_indices, max_per_sector)
+    groups = list(sector_indices.values()) if sector_indices else None
+    return branch_and_bound_search(Q, k, groups=groups, progress=progress, time_limit=time_limit)
+
+
+@traced('heuristic')
+def classical_heuristic(returns, covariance, k, lambda_param=0.5, sector_indices=None, max_per_sector=1,
+                        method='simulated_annealing', qubo=None, progress=None, seed=42):
+    """Approximate optimum of the same QUBO by simulated annealing or tabu search (see heuristics.py)."""
+    if method not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{method}'")
+    Q = qubo[0] if qubo is not None else build_qubo_matrix(returns, covariance, k, lambda_param,
+                                                           sector_indices, max_per_sector)
+    return HEURISTICS[method](Q, k, seed=seed, progress=progress)
+
+
+@traced('ising')
 def qubo_to_ising(Q):
+    """Map x @ Q @ x onto offset + h.z + z.J.z with x = (1 - z) / 2."""
     n = Q.shape[0]
-    h, J, offset = np.zeros(n), np.zeros((n, n)), 0.0
-    for i in range(n):
-        for j in range(n):
-            if i == j:
-                offset += Q[i, i] / 2
-                h[i] -= Q[i, i] / 2
-            else:
-                offset += Q[i, j] / 4
-                h[i] -= Q[i, j] / 4
-                h[j] -= Q[i, j] / 4
-                if i < j:
-                    J[i, j] += Q[i, j] / 4
-                else:
-                    J[j, i] += Q[i, j] / 4
+    terms = Q / 4
+    terms[np.diag_indices(n)] = np.diag(Q) / 2
+    # Sums are accumulated sequentially in row-major term order so h and offset
+    # stay bit-identical to the original element-by-element loop.
+    offset = float(np.add.accumulate(terms.ravel())[-1])
+    column_terms = terms.T.copy()
+    column_terms[np.diag_indices(n)] = 0.0
+    ordered = np.hstack([np.tril(column_terms, -1), terms, np.triu(column_terms, 1)])
+    h = -np.add.accumulate(ordered, axis=1)[:, -1]
+    J = np.triu(terms + terms.T, 1)
     return h, J, offset
 
 
 def build_cost_hamiltonian(h, J, n):
-    pauli_list, coeffs = [], []
-    for i in range(n):
-        if h[i] != 0:
-            pauli = ['I'] * n
-            pauli[n - 1 - i] = 'Z'
-            pauli_list.append(''.join(pauli))
-            coeffs.append(h[i])
-    for i in range(n):
-        for j in range(i + 1, n):
-            if J[i, j] != 0:
-                pauli = ['I'] * n
-                pauli[n - 1 - i] = 'Z'
-                pauli[n - 1 - j] = 'Z'
-                pauli_list.append(''.join(pauli))
-                coeffs.append(J[i, j])
-    return SparsePauliOp(pauli_list, coeffs) if pauli_list else SparsePauliOp(['I' * n], [0.0])
-
-
-def create_qaoa_circuit(gamma, beta, h, J, n):
-    qc = QuantumCircuit(n)
-    qc.h(range(n))
-    for layer in range(len(gamma)):
-        for i in range(n):
-            if h[i] != 0:
-                qc.rz(2 * gamma[layer] * h[i], i)
-        for i in range(n):
-            for j in range(i + 1, n):
-                if J[i, j] != 0:
-                    qc.cx(i, j)
-                    qc.rz(2 * gamma[layer] * J[i, j], j)
-                    qc.cx(i, j)
-        for i in range(n):
-            qc.rx(2 * beta[layer], i)
-    qc.measure_all()
-    return qc
+    from qiskit.quantum_info import SparsePauliOp
+    linear = [('Z', [i], h[i]) for i in np.flatnonzero(h[:n])]
+    rows, cols = np.nonzero(np.triu(J[:n, :n], 1))
+    quadratic = [('ZZ', [i, j], J[i, j]) for i, j in zip(rows, cols)]
+    if not linear and not quadratic:
+        return SparsePauliOp(['I' * n], [0.0])
+    return SparsePauliOp.from_sparse_list(linear + quadratic, num_qubits=n)
 
 
-def evaluate_cost(params, p, h, J, n, Q, shots=1024):
-    gamma, beta = params[:p], params[p:]
-    qc = create_qaoa_circuit(list(gamma), list(beta), h, J, n)
-    result = StatevectorSampler().run([qc], shots=shots).result()
-    counts = result[0].data.meas.get_counts()
-    total_cost, total_counts = 0.0, 0
-    for bitstring, count in counts.items():
-        x = np.array([int(b) for b in bitstring[::-1]])
-        total_cost += (x @ Q @ x) * count
-        total_counts += count
-    return total_cost / total_counts
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _qaoa_template(n, p, h_support, j_support, mixer='x', k=None):
+    """Transpiled QAOA circuit for one problem structure, with every angle left symbolic.
 
+    XY mixers start from the feasible product state |1..10..0> (k ones) and
+    keep the Hamming weight fixed; the X mixer starts from |+>^n.
+    """
+    from qiskit import QuantumCircuit, transpile
+    from qiskit.circuit import ParameterVector
+    from qiskit.circuit.library import XXPlusYYGate
+    gamma, beta = ParameterVector('gamma', p), ParameterVector('beta', p)
+    h_coeffs, j_coeffs = ParameterVector('h', len(h_support)), ParameterVector('J', len(j_support))
+    qc = QuantumCircuit(n)
+    if mixer == 'x':
+        qc.h(range(n))
+    elif k:
+        qc.x(range(k))
+    for layer in range(p):
+        for i, coeff in zip(h_support, h_coeffs):
+            qc.rz(2 * gamma[layer] * coeff, i)
+        for (i, j), coeff in zip(j_support, j_coeffs):
+            qc.cx(i, j)
+            qc.rz(2 * gamma[layer] * coeff, j)
+            qc.cx(i, j)
+        if mixer == 'x':
+            qc.rx(2 * beta[layer], range(n))
+        else:
+            for i, j in xy_edges(n, mixer):
+                qc.append(XXPlusYYGate(2 * beta[layer]), [i, j])
+    qc.measure_all()
+    count_event('circuits_built')
+    qc = transpile(qc, basis_gates=['h', 'x', 'rz', 'rx', 'cx', 'xx_plus_yy'], optimization_level=0)
+    return qc, list(gamma) + list(beta), list(h_coeffs), list(j_coeffs)
+
+
+@traced('circuit')
+def qaoa_ansatz(h, J, n, p, mixer='x', k=None):
+    """QAOA circuit for this Ising problem with only the 2p angles [gamma..., beta...] unbound."""
+    h_support = tuple(np.flatnonzero(h[:n]).tolist())
+    j_support = tuple(zip(*(idx.tolist() for idx in np.nonzero(np.triu(J[:n, :n], 1)))))
+    template, angles, h_coeffs, j_coeffs = _qaoa_template(n, p, h_support, j_support, mixer,
+                                                          None if mixer == 'x' else k)
+    values = dict(zip(h_coeffs, (float(h[i]) for i in h_support)))
+    values.update(zip(j_coeffs, (float(J[i, j]) for i, j in j_support)))
+    return template.assign_parameters(values), angles
+
+
+def create_qaoa_circuit(gamma, beta, h, J, n, mixer='x', k=None):
+    qc, angles = qaoa_ansatz(h, J, n, len(gamma), mixer, k)
+    return qc.assign_parameters(dict(zip(angles, list(gamma) + list(beta))))
+
+
+def evaluate_cost(params, ansatz, Q, shots=1024):
+    from qiskit.primitives import StatevectorSampler
+    qc, angles = ansatz
+    qc = qc.assign_parameters(dict(zip(angles, params)))
+    with stage('sampler'):
+        result = StatevectorSampler().run([qc], shots=shots).result()
+    count_event('shots_sampled', shots)
+    # Decode the packed outcomes in bulk and score each distinct one once
+    masks, counts = np.unique(packed_to_masks(result[0].data.meas.array), return_counts=True)
+    return float(subspace_costs(Q, masks) @ counts) / counts.sum()
+
+
+def top_portfolios(masks, counts, costs, n, k, top=5):
+    """The `top` cheapest sampled states with exactly k assets, with their cost and sampled probability."""
+    bits = (masks[:, None] >> np.arange(n)) & 1
+    feasible = np.flatnonzero(bits.sum(axis=1) == k)
+    order = feasible[np.lexsort((-counts[feasible], costs[feasible]))][:top]
+    return [{'selected_indices': np.flatnonzero(bits[j]).tolist(), 'cost': float(costs[j]),
+             'probability': float(counts[j] / counts.sum())} for j in order]
+
+
+class QAOAObjective:
+    """Energy, gradient and final readout of one QAOA instance.
+
+    Simulation state (cost tables, subspace pairs, the bound circuit) is built
+    on first use and dropped when pickled, so instances can be shipped to
+    worker processes cheaply.
+    """
 
+    def __init__(self, Q, h, J, k, p, mode='exact', mixer='x', shots=1024, precision='complex128'):
+        self.Q, self.h, self.J = Q, h, J
+        self.n, self.k, self.p = Q.shape[0], k, p
+        self.mode, self.mixer, self.shots, self.precision = mode, mixer, shots, precision
+        self._state = None
+
+    def __getstate__(self):
+        return {**self.__dict__, '_state': None}
+
+    def _build(self):
+        if self._state is None:
+            if self.mode == 'sampler':
+                self._state = {'ansatz': qaoa_ansatz(self.h, self.J, self.n, self.p, self.mixer, self.k)}
+            elif self.mode == 'chunked':
+                self._state = {'simulator': ChunkedStatevector(self.Q, self.precision, STATE_DIR)}
+            elif self.mixer == 'x':
+                self._state = {'costs': cost_diagonal(self.Q)}
+            else:
+                masks = feasible_states(self.n, self.k)
+                self._state = {'masks': masks, 'costs': subspace_costs(self.Q, masks),
+                               'pairs': xy_pairs(masks, xy_edges(self.n, self.mixer))}
+        return self._state
+
+    @property
+    def has_gradient(self):
+        return self.mode == 'exact'
+
+    @property
+    def dimension(self):
+        return len(self._build()['costs']) if self.mode == 'exact' else 2 ** self.n
+
+    def energy(self, params):
+        state, p = self._build(), self.p
+        if self.mode == 'sampler':
+            return evaluate_cost(params, state['ansatz'], self.Q, self.shots)
+        if self.mode == 'chunked':
+            return state['simulator'].expectation(params[:p], params[p:])
+        if self.mixer == 'x':
+            return expectation(params[:p], params[p:], state['costs'], self.n)
+        return xy_expectation(params[:p], params[p:], state['costs'], state['pairs'])
+
+    def gradient(self, params):
+        state, p = self._build(), self.p
+        if self.mixer == 'x':
+            return expectation_gradient(params[:p], params[p:], state['costs'], self.n)
+        return xy_expectation_gradient(params[:p], params[p:], state['costs'], state['pairs'])
+
+    def samples(self, params, shots):
+        """Measured outcomes for the final angles as sorted (masks, counts) arrays, bit i = asset i."""
+        state, p, n = self._build(), self.p, self.n
+        count_event('shots_sampled', shots)
+        if self.mode == 'sampler':
+            from qiskit.primitives import StatevectorSampler
+            qc, angles = state['ansatz']
+            final_qc = qc.assign_parameters(dict(zip(angles, params)))
+            with stage('sampler'):
+                result = StatevectorSampler().run([final_qc], shots=shots).result()
+            return np.unique(packed_to_masks(result[0].data.meas.array), return_counts=True)
+        if self.mode == 'chunked':
+            return state['simulator'].sample(params[:p], params[p:], shots, seed=42)
+        if self.mixer == 'x':
+            return sample_outcomes(qaoa_state(params[:p], params[p:], state['costs'], n), shots, seed=42)
+        indices, counts = sample_outcomes(xy_qaoa_state(params[:p], params[p:], state['costs'], state['pairs']),
+                                          shots, seed=42)
+        return state['masks'][indices], counts
+
+
+def _optimize_start(start, objective, method, maxiter, plateau=None, deadline=None, on_evaluation=None):
+    """Run one optimizer start; `start` is (x0, seed, rhobeg). Returns (params, energy, evaluations, stop_reason)."""
+    x0, seed, rhobeg = start
+    tracked = TrackedObjective(objective.energy, on_evaluation, plateau, deadline)
+    gradient = objective.gradient if objective.has_gradient else None
+    reason = run_optimizer(tracked, x0, method, maxiter, gradient, seed, rhobeg)
+    return tracked.best_params, tracked.best_energy, tracked.evaluations, reason
+
+
+@traced('qaoa')
 def optimize_qaoa(returns, covariance, k, lambda_param=0.5, p=1, maxiter=50, shots=1024,
-                  sector_indices=None, max_per_sector=1):
+                  sector_indices=None, max_per_sector=1, mode='exact', qubo=None, progress=None, mixer='x',
+                  warm_start=True, optimizer='cobyla', starts=1, time_budget=None, plateau=None, workers=None, top=5,
+                  precision='complex128'):
+    """Run QAOA. mode='exact' optimizes the noise-free statevector energy and only samples
+    the final readout; mode='sampler' samples the Qiskit circuit on every optimizer step.
+    mode='chunked' is the exact x-mixer energy from ChunkedStatevector, for 21-30
+    qubits: `precision` 'complex64' halves its memory, and QPO_STATE_DIR moves
+    the state to a memory-mapped file.
+    mixer='x' is the transverse-field ansatz over all 2^n states; 'xy_ring' and
+    'xy_complete' keep exactly k assets selected, and in exact mode the state is
+    only stored over the C(n, k) feasible portfolios, starting (like the circuit)
+    from the first k assets selected.
+    Pass a prebuilt (Q, h, J, offset) as `qubo` to skip rebuilding it, and a
+    `progress(stage, **fields)` callable to observe every objective evaluation;
+    if it returns True the optimizer stops and reads out the best angles so far.
+    With warm_start, the first start begins from the nearest stored angles (see
+    warmstart.py) with a smaller initial step, and the optimized angles are stored
+    for later requests.
+    `optimizer` is 'cobyla', 'spsa' or 'l-bfgs-b' (exact mode, adjoint gradient).
+    `starts` > 1 runs extra random starts on a process pool and keeps the best;
+    progress is then reported once per finished start. Each start stops after
+    `plateau` evaluations without improvement or once `time_budget` seconds pass.
+    The final readout is decoded as integer arrays; `top_portfolios` lists the
+    `top` cheapest sampled portfolios with exactly k assets."""
+    if mode not in QAOA_MODES:
+        raise ValueError(f"Unknown QAOA mode '{mode}'")
+    if mode == 'chunked' and mixer != 'x':
+        raise ValueError("mode='chunked' simulates the x mixer; XY mixers run over the feasible subspace in exact mode")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Use one of: {', '.join(PRECISIONS)}")
+    if mixer not in MIXERS:
+        raise ValueError(f"Unknown QAOA mixer '{mixer}'")
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer '{optimizer}'")
+    if optimizer == 'l-bfgs-b' and mode != 'exact':
+        raise ValueError("optimizer 'l-bfgs-b' needs mode='exact' for analytic gradients")
     n = len(returns)
-    Q = build_qubo_matrix(returns, covariance, k, lambda_param, sector_indices, max_per_sector)
-    h, J, offset = qubo_to_ising(Q)
-
-    np.random.seed(42)
-    initial_params = np.random.uniform(0, np.pi, 2 * p)
-
-    print(f"Running QAOA (p={p}, n={n}, k={k}, sector_diversify={sector_indices is not None})...")
-    result = minimize(
-        lambda params: evaluate_cost(params, p, h, J, n, Q, shots),
-        initial_params, method='COBYLA', options={'maxiter': maxiter}
-    )
-
-    gamma_opt, beta_opt = result.x[:p], result.x[p:]
-    final_qc = create_qaoa_circuit(list(gamma_opt), list(beta_opt), h, J, n)
-    final_counts = StatevectorSampler().run([final_qc], shots=shots * 4).result()[0].data.meas.get_counts()
-
-    best_bitstring, best_cost = None, float('inf')
-    for bitstring, count in final_counts.items():
-        x = np.array([int(b) for b in bitstring[::-1]])
-        cost = x @ Q @ x
-        if cost < best_cost:
-            best_cost = cost
-            best_bitstring = bitstring[::-1]
+    if qubo is not None:
+        Q, h, J, offset = qubo
+    else:
+        Q = build_qubo_matrix(returns, covariance, k, lambda_param, sector_indices, max_per_sector)
+        h, J, offset = qubo_to_ising(Q)
+
+    features = problem_features(Q, k, lambda_param, p, mixer)
+    warm = angle_store.lookup(features) if warm_start else None
+    if warm is not None:
+        initial_points = [(np.concatenate(warm[:2]), 42, WARM_RHOBEG)]
+        warm = warm[2]
+    else:
+        np.random.seed(42)
+        initial_points = [(np.random.uniform(0, np.pi, 2 * p), 42, None)]
+    initial_points += [(np.random.default_rng(42 + i).uniform(0, np.pi, 2 * p), 42 + i, None)
+                       for i in range(1, starts)]
+
+    print(f"Running QAOA (p={p}, n={n}, k={k}, mode={mode}, mixer={mixer}, optimizer={optimizer}, "
+          f"starts={starts}, sector_diversify={sector_indices is not None})...")
+    objective = QAOAObjective(Q, h, J, k, p, mode, mixer, shots, precision)
+    if mode == 'chunked':
+        workers = 1  # every start process would hold its own 2^n state buffer
+    deadline = time.time() + time_budget if time_budget else None
+    run = partial(_optimize_start, objective=objective, method=optimizer, maxiter=maxiter,
+                  plateau=plateau, deadline=deadline)
+
+    user_stopped = []
+    if starts == 1:
+        def on_evaluation(evaluations, energy, params):
+            return progress is not None and progress('qaoa', iteration=evaluations, maxiter=maxiter, energy=energy,
+                                                     gamma=[float(g) for g in params[:p]],
+                                                     beta=[float(b) for b in params[p:]])
+        results = {0: run(initial_points[0], on_evaluation=on_evaluation)}
+    else:
+        finished, latest = [], {}
+
+        def report(**fields):
+            # Also polled while starts run, repeating the last figures so every event is complete
+            latest.update(fields)
+            if progress is not None and progress('qaoa', maxiter=maxiter * starts, start=len(finished),
+                                                 starts=starts, **latest):
+                user_stopped.append(True)
+            return bool(user_stopped)
+
+        def on_result(index, result):
+            finished.append(result)
+            params = min(finished, key=lambda r: r[1])[0]
+            return report(iteration=sum(r[2] for r in finished), energy=min(r[1] for r in finished),
+                          gamma=[float(g) for g in params[:p]], beta=[float(b) for b in params[p:]])
+        results = run_starts(run, initial_points, workers, on_result, should_stop=report)
+
+    params_opt, final_energy, iterations, stop_reason = min(results.values(), key=lambda r: r[1])
+    stopped_early = bool(user_stopped) or any(r[3] == 'stopped' for r in results.values())
+    total_evaluations = sum(r[2] for r in results.values())
+    count_event('objective_evaluations', total_evaluations)
+    if stopped_early:
+        print(f"QAOA stopped early after {total_evaluations} evaluations")
+
+    gamma_opt, beta_opt = params_opt[:p], params_opt[p:]
+    if warm_start and not stopped_early:
+        angle_store.record(features, gamma_opt, beta_opt, final_energy,
+                           warm['cold_iterations'] if warm else iterations)
+    masks, counts = objective.samples(params_opt, shots * 4)
+    costs = subspace_costs(Q, masks)
+    best = int(np.argmin(costs))
+    best_bitstring = format(int(masks[best]), f'0{n}b')[::-1]
 
     return {
         'selected_indices': [i for i, b in enumerate(best_bitstring) if b == '1'],
         'optimal_bitstring': best_bitstring,
-        'optimal_cost': best_cost,
-        'iterations': result.nit if hasattr(result, 'nit') else maxiter,
+        'optimal_cost': float(costs[best]),
+        'top_portfolios': top_portfolios(masks, counts, costs, n, k, top),
+        'final_energy': float(final_energy),
+        'iterations': iterations,
+        'total_evaluations': total_evaluations,
+        'stopped_early': stopped_early,
+        'stop_reason': 'stopped' if stopped_early else stop_reason,
+        'optimizer': optimizer,
+        'starts': len(results),
+        'warm_start': warm,
+        'iterations_saved': max(0, warm['cold_iterations'] - iterations) if warm else 0,
         'num_qubits': n,
-        'qaoa_layers': p
+        'qaoa_layers': p,
+        'mixer': mixer,
+        'state_dimension': objective.dimension
     }
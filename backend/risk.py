@@ -0,0 +1,149 @@
+import time
+import threading
+import numpy as np
+
+from stocks import NIFTY_50, load_closes, price_frame
+from price_cache import price_cache
+from memo import returns_key
+
+RISK_MODELS = ('sample', 'ledoit_wolf', 'ewma', 'factor')
+EWMA_DECAY = 0.97
+TRADING_DAYS = 252
+
+
+class RiskModel:
+    """Annualized expected returns and covariance B @ B.T + diag(d) over a fixed ticker list.
+
+    When the factor rank is at least the number of tickers the dense matrix is
+    stored instead, so a basket slice costs O(k^2) dense or O(k^2 * rank)
+    low-rank, never a pass over prices.
+    """
+
+    def __init__(self, tickers, returns, loadings, specific, method):
+        self.tickers, self.method = list(tickers), method
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        self.returns = returns
+        if loadings.shape[1] >= len(self.tickers):
+            self.loadings, self.specific = None, None
+            self.dense = loadings @ loadings.T + np.diag(specific)
+        else:
+            self.loadings, self.specific, self.dense = loadings, specific, None
+
+    @property
+    def rank(self):
+        return len(self.tickers) if self.dense is not None else self.loadings.shape[1]
+
+    def covers(self, tickers):
+        return all(t in self.index for t in tickers)
+
+    def slice(self, tickers):
+        """(returns, covariance) for a basket, in the basket's order."""
+        idx = np.array([self.index[t] for t in tickers], dtype=np.int64)
+        if self.dense is not None:
+            return self.returns[idx], self.dense[np.ix_(idx, idx)]
+        B = self.loadings[idx]
+        return self.returns[idx], B @ B.T + np.diag(self.specific[idx])
+
+
+def estimate_risk_model(prices, method='ledoit_wolf', sectors=None):
+    """Fit a RiskModel to a price frame from daily log returns.
+
+    'sample' is the unbiased sample covariance (as calculate_returns_and_cov),
+    'ledoit_wolf' shrinks it towards a scaled identity with the Ledoit-Wolf
+    (2004) optimal intensity, 'ewma' weights days by EWMA_DECAY ** age, and
+    'factor' regresses each asset on its sector's equal-weight return (sectors
+    default to the NIFTY_50 'sector' field), keeping the sector-factor
+    covariance plus a diagonal of residual variances.
+    """
+    if method not in RISK_MODELS:
+        raise ValueError(f"Unknown risk model '{method}'. Use one of: {', '.join(RISK_MODELS)}")
+    tickers = list(prices.columns)
+    X = np.log(prices / prices.shift(1)).dropna().values
+    T, n = X.shape
+    returns = X.mean(axis=0) * TRADING_DAYS
+    Xc = X - X.mean(axis=0)
+    scale = np.sqrt(TRADING_DAYS)
+
+    if method == 'sample':
+        loadings, specific = Xc.T * (scale / np.sqrt(T - 1)), np.zeros(n)
+    elif method == 'ledoit_wolf':
+        S = Xc.T @ Xc / T
+        mu = np.trace(S) / n
+        delta = np.sum((S - mu * np.eye(n)) ** 2) / n
+        beta = min(delta, (np.sum(np.sum(Xc ** 2, axis=1) ** 2) / T - np.sum(S ** 2)) / T / n)
+        shrinkage = beta / delta if delta > 0 else 1.0
+        loadings = Xc.T * (scale * np.sqrt((1 - shrinkage) / T))
+        specific = np.full(n, shrinkage * mu * TRADING_DAYS)
+    elif method == 'ewma':
+        weights = EWMA_DECAY ** np.arange(T - 1, -1, -1)
+        weights /= weights.sum()
+        Xw = X - weights @ X
+        loadings, specific = Xw.T * (scale * np.sqrt(weights)), np.zeros(n)
+    else:
+        sectors = sectors or [NIFTY_50.get(t, {}).get('sector', 'Unknown') for t in tickers]
+        names = list(dict.fromkeys(sectors))
+        member = np.array([[s == name for name in names] for s in sectors], dtype=float)
+        factors = Xc @ member / member.sum(axis=0)
+        own = factors @ member.T
+        betas = np.einsum('ti,ti->i', Xc, own) / np.maximum(np.einsum('ti,ti->i', own, own), 1e-300)
+        residuals = Xc - own * betas
+        F = factors.T @ factors / (T - 1)
+        # B F B^T with B = member * betas, factored through the Cholesky-like root of F
+        w, V = np.linalg.eigh(F)
+        root = V * np.sqrt(np.clip(w, 0, None))
+        loadings = (member * betas[:, None]) @ root * scale
+        specific = residuals.var(axis=0, ddof=1) * TRADING_DAYS
+    return RiskModel(tickers, returns, loadings, specific, method)
+
+
+class UniverseRiskModels:
+    """Risk models fitted once over the whole NIFTY_50 universe, refreshed after the price-cache TTL.
+
+    basket() slices them for any basket whose prices come from the same
+    source; baskets on mock or partial data get a model fitted on their own prices.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = price_cache.ttl if ttl is None else ttl
+        self.hits = self.builds = 0
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, method, period='2y'):
+        """(model, data_key) for the universe, or (None, None) when no universe prices are available."""
+        with self._lock:
+            entry = self._models.get((method, period))
+            if entry is not None and time.time() - entry[2] < self.ttl:
+                self.hits += 1
+                return entry[0], entry[1]
+        closes, status = load_closes(list(NIFTY_50), period)
+        prices = price_frame(closes) if closes else None
+        if prices is None or len(prices) <= 50:
+            return None, None
+        entry = (estimate_risk_model(prices, method), ('universe', method) + returns_key(prices, period), time.time())
+        with self._lock:
+            self._models[(method, period)] = entry
+            self.builds += 1
+        return entry[0], entry[1]
+
+    def basket(self, prices, stock_status, method, period='2y'):
+        """(returns, covariance, data_key) of a basket under `method`."""
+        tickers = list(prices.columns)
+        if all(stock_status.get(t) == 'available' for t in tickers):
+            model, key = self.get(method, period)
+            if model is not None and model.covers(tickers):
+                return model.slice(tickers) + ((key, tuple(tickers)),)
+        model = estimate_risk_model(prices, method)
+        return model.returns, model.slice(tickers)[1], (method,) + returns_key(prices, period)
+
+    def warm(self, methods, period='2y'):
+        for method in methods:
+            self.get(method, period)
+
+    def stats(self):
+        with self._lock:
+            return {'models': [f"{method}/{period}" for method, period in self._models],
+                    'hits': self.hits, 'builds': self.builds, 'ttl_seconds': self.ttl}
+
+
+risk_models = UniverseRiskModels()
@@ -0,0 +1,277 @@
+import os
+import tempfile
+import numpy as np
+from itertools import chain, combinations
+
+CHUNK_QUBITS = 20
+STATE_DIR = os.environ.get('QPO_STATE_DIR') or None
+
+
+def cost_diagonal(Q):
+    """Return x @ Q @ x for every basis state, indexed with bit i = qubit i (Qiskit order)."""
+    n = Q.shape[0]
+    Q = np.asarray(Q, dtype=float)
+    W = Q + Q.T
+    costs = np.zeros(1)
+    for m in range(n):
+        # Linear contribution of bit m given bits 0..m-1, built by the same doubling trick
+        coupling = np.zeros(1)
+        for j in range(m):
+            coupling = np.concatenate([coupling, coupling + W[j, m]])
+        costs = np.concatenate([costs, costs + Q[m, m] + coupling])
+    return costs
+
+
+MIXER_BLOCK = 4
+
+
+def apply_mixer(state, beta, n):
+    """Apply RX(2*beta) to every qubit, MIXER_BLOCK qubits at a time as one small dense matmul."""
+    rx = np.array([[np.cos(beta), -1j * np.sin(beta)], [-1j * np.sin(beta), np.cos(beta)]], dtype=state.dtype)
+    q = 0
+    while q < n:
+        width = min(MIXER_BLOCK, n - q)
+        block = rx
+        for _ in range(width - 1):
+            block = np.kron(block, rx)
+        view = state.reshape(-1, 1 << width, 1 << q)
+        state[:] = np.matmul(block, view).reshape(-1)
+        q += width
+    return state
+
+
+def qaoa_state(gamma, beta, costs, n):
+    """Statevector of the standard QAOA ansatz |+>^n -> (phase, mixer)^p."""
+    state = np.full(1 << n, 1.0 / np.sqrt(1 << n), dtype=complex)
+    for g, b in zip(gamma, beta):
+        state *= np.exp(-1j * g * costs)
+        apply_mixer(state, b, n)
+    return state
+
+
+def expectation(gamma, beta, costs, n):
+    """Noise-free <C> for the given angles."""
+    probs = np.abs(qaoa_state(gamma, beta, costs, n)) ** 2
+    return float(probs @ costs)
+
+
+def apply_x_sum(state, n):
+    """Return (X_0 + ... + X_{n-1}) |state>, the generator of the RX mixer."""
+    out = np.zeros_like(state)
+    for q in range(n):
+        out.reshape(-1, 2, 1 << q)[...] += state.reshape(-1, 2, 1 << q)[:, ::-1, :]
+    return out
+
+
+def expectation_gradient(gamma, beta, costs, n):
+    """Exact d<C>/d[gamma..., beta...] from one adjoint pass.
+
+    Walking the circuit backwards with psi (the state) and lam = U_rest^dag C psi,
+    each gate exp(-i theta G) contributes 2 Im <lam|G|psi> at the point right after it.
+    """
+    p = len(gamma)
+    psi = qaoa_state(gamma, beta, costs, n)
+    lam = costs * psi
+    grad = np.zeros(2 * p)
+    for layer in reversed(range(p)):
+        grad[p + layer] = 2 * np.vdot(lam, apply_x_sum(psi, n)).imag
+        apply_mixer(psi, -beta[layer], n)
+        apply_mixer(lam, -beta[layer], n)
+        grad[layer] = 2 * np.vdot(lam, costs * psi).imag
+        undo = np.exp(1j * gamma[layer] * costs)
+        psi *= undo
+        lam *= undo
+    return grad
+
+
+def sample_outcomes(state, shots, seed=None):
+    """Sample basis-state indices from a statevector, returning sorted (indices, counts) arrays."""
+    probs = np.abs(state) ** 2
+    probs /= probs.sum()
+    draws = np.random.default_rng(seed).choice(len(probs), size=shots, p=probs)
+    return np.unique(draws, return_counts=True)
+
+
+class ChunkedStatevector:
+    """x-mixer QAOA statevector for 21-30 qubits, kept in one complex64/complex128 buffer.
+
+    The buffer is a memmap in a temporary file under `directory` when given
+    (default QPO_STATE_DIR), and is reused across evaluations. It is processed
+    2^chunk_qubits amplitudes at a time, and the cost diagonal is never stored:
+    a chunk fixes the high bits, so its costs are the low-bit cost table plus a
+    constant and a field linear in the low bits. The phase and the RX mixer on
+    the low qubits are applied in one pass per chunk; each high qubit is an
+    in-place butterfly pass over pairs of chunks.
+    """
+
+    def __init__(self, Q, dtype=np.complex128, directory=None, chunk_qubits=CHUNK_QUBITS):
+        Q = np.asarray(Q, dtype=float)
+        self.n, self.dtype, self.directory = Q.shape[0], np.dtype(dtype), directory
+        self.low = low = min(chunk_qubits, self.n)
+        self.low_costs = cost_diagonal(Q[:low, :low])
+        X = ((np.arange(1 << (self.n - low))[:, None] >> np.arange(self.n - low)) & 1).astype(float)
+        self.offsets = np.einsum('ci,ci->c', X @ Q[low:, low:], X)
+        self.fields = X @ (Q[low:, :low] + Q[:low, low:].T)
+        self._state = self._file = None
+
+    def __getstate__(self):
+        return {**self.__dict__, '_state': None, '_file': None}
+
+    def _buffer(self):
+        if self._state is None:
+            if self.directory is None:
+                self._state = np.empty(1 << self.n, dtype=self.dtype)
+            else:
+                self._file = tempfile.TemporaryFile(dir=self.directory)
+                self._state = np.memmap(self._file, dtype=self.dtype, mode='w+', shape=(1 << self.n,))
+        return self._state
+
+    def chunks(self):
+        size = 1 << self.low
+        return [slice(c * size, (c + 1) * size) for c in range(len(self.offsets))]
+
+    def chunk_costs(self, c, out=None):
+        """x @ Q @ x for the basis states of chunk c, filled low bit by low bit."""
+        out = np.empty(1 << self.low) if out is None else out
+        out[0] = self.offsets[c]
+        for j, field in enumerate(self.fields[c]):
+            np.add(out[:1 << j], field, out=out[1 << j:2 << j])
+        out += self.low_costs
+        return out
+
+    def _butterfly(self, state, beta, q):
+        """RX(2*beta) on high qubit q, in place, one chunk-sized pair of halves at a time."""
+        c, s = self.dtype.type(np.cos(beta)), self.dtype.type(-1j * np.sin(beta))
+        view, size = state.reshape(-1, 2, 1 << q), 1 << self.low
+        for pair in view:
+            for a in range(0, 1 << q, size):
+                top, bottom = pair[0, a:a + size], pair[1, a:a + size]
+                saved = top.copy()
+                top *= c
+                top += s * bottom
+                bottom *= c
+                bottom += s * saved
+
+    def evolve(self, gamma, beta):
+        """Run |+>^n -> (phase, mixer)^p in the buffer and return it."""
+        state, costs = self._buffer(), np.empty(1 << self.low)
+        state.fill(1.0 / np.sqrt(1 << self.n))
+        for g, b in zip(gamma, beta):
+            for c, chunk in enumerate(self.chunks()):
+                block = state[chunk]
+                block *= np.exp(-1j * g * self.chunk_costs(c, costs))
+                apply_mixer(block, b, self.low)
+            for q in range(self.low, self.n):
+                self._butterfly(state, b, q)
+        return state
+
+    def expectation(self, gamma, beta):
+        state, costs = self.evolve(gamma, beta), np.empty(1 << self.low)
+        return float(sum(np.abs(state[chunk]) ** 2 @ self.chunk_costs(c, costs)
+                         for c, chunk in enumerate(self.chunks())))
+
+    def sample(self, gamma, beta, shots, seed=None):
+        """Sorted (indices, counts) of `shots` draws: a multinomial over chunks, then within each chunk."""
+        state, rng = self.evolve(gamma, beta), np.random.default_rng(seed)
+        chunks = self.chunks()
+        weights = np.array([np.vdot(state[chunk], state[chunk]).real for chunk in chunks])
+        draws = []
+        for chunk, shots_here in zip(chunks, rng.multinomial(shots, weights / weights.sum())):
+            if shots_here:
+                probs = np.abs(state[chunk].astype(complex)) ** 2
+                draws.append(chunk.start + rng.choice(len(probs), size=shots_here, p=probs / probs.sum()))
+        return np.unique(np.concatenate(draws), return_counts=True)
+
+
+def packed_to_masks(packed):
+    """Integer outcomes (bit i = qubit i) from the packed rows of a Qiskit BitArray (big-endian bytes)."""
+    packed = np.asarray(packed, dtype=np.int64)
+    shifts = 8 * np.arange(packed.shape[-1] - 1, -1, -1, dtype=np.int64)
+    return np.bitwise_or.reduce(packed << shifts, axis=-1)
+
+
+def feasible_states(n, k):
+    """Sorted bitmasks of every n-bit basis state with Hamming weight k (qubit i = bit i)."""
+    if k == 0:
+        return np.zeros(1, dtype=np.int64)
+    combos = np.fromiter(chain.from_iterable(combinations(range(n), k)), dtype=np.int64).reshape(-1, k)
+    return np.sort((np.int64(1) << combos).sum(axis=1))
+
+
+def subspace_costs(Q, masks):
+    """x @ Q @ x for each state in `masks`."""
+    n = Q.shape[0]
+    X = ((masks[:, None] >> np.arange(n)) & 1).astype(float)
+    return np.einsum('bi,bi->b', X @ np.asarray(Q, dtype=float), X)
+
+
+def xy_edges(n, mixer='xy_ring'):
+    """Qubit pairs of the XY mixer, in application order.
+
+    'xy_ring' uses the parity-ordered ring (even pairs, odd pairs, then the
+    closing pair), 'xy_complete' every pair i < j.
+    """
+    if mixer == 'xy_complete':
+        return list(combinations(range(n), 2))
+    if mixer != 'xy_ring':
+        raise ValueError(f"Unknown XY mixer '{mixer}'")
+    edges = [(i, i + 1) for i in range(0, n - 1, 2)] + [(i, i + 1) for i in range(1, n - 1, 2)]
+    return edges + [(n - 1, 0)] if n > 2 else edges
+
+
+def xy_pairs(masks, edges):
+    """For each edge (i, j), the subspace index pairs (a, b) swapped by the XY hop: bit i set in a, bit j in b."""
+    pairs = []
+    for i, j in edges:
+        bi, bj = np.int64(1) << i, np.int64(1) << j
+        a = np.flatnonzero(((masks & bi) != 0) & ((masks & bj) == 0))
+        b = np.searchsorted(masks, masks[a] ^ (bi | bj))
+        pairs.append((a.astype(np.int32), b.astype(np.int32)))
+    return pairs
+
+
+def apply_xy_mixer(state, beta, pairs):
+    """Apply exp(-i*beta*(XX + YY)/2) edge by edge; amplitude only moves between states of equal weight."""
+    c, s = np.cos(beta), -1j * np.sin(beta)
+    for a, b in pairs:
+        sa, sb = state[a], state[b]
+        state[a] = c * sa + s * sb
+        state[b] = s * sa + c * sb
+    return state
+
+
+def xy_qaoa_state(gamma, beta, costs, pairs):
+    """QAOA over the feasible subspace only: |1..10..0> -> (phase, XY mixer)^p, one amplitude per state.
+
+    The start is masks[0] = (1 << k) - 1, the product state the sampler circuit prepares with X gates.
+    """
+    state = np.zeros(len(costs), dtype=complex)
+    state[0] = 1.0
+    for g, b in zip(gamma, beta):
+        state *= np.exp(-1j * g * costs)
+        apply_xy_mixer(state, b, pairs)
+    return state
+
+
+def xy_expectation(gamma, beta, costs, pairs):
+    """Noise-free <C> of the XY-mixer ansatz."""
+    probs = np.abs(xy_qaoa_state(gamma, beta, costs, pairs)) ** 2
+    return float(probs @ costs)
+
+
+def xy_expectation_gradient(gamma, beta, costs, pairs):
+    """Adjoint gradient of xy_expectation; every edge of the mixer is its own gate sharing beta."""
+    p = len(gamma)
+    psi = xy_qaoa_state(gamma, beta, costs, pairs)
+    lam = costs * psi
+    grad = np.zeros(2 * p)
+    for layer in reversed(range(p)):
+        for a, b in reversed(pairs):
+            grad[p + layer] += 2 * (np.vdot(lam[a], psi[b]) + np.vdot(lam[b], psi[a])).imag
+            apply_xy_mixer(psi, -beta[layer], [(a, b)])
+            apply_xy_mixer(lam, -beta[layer], [(a, b)])
+        grad[layer] = 2 * np.vdot(lam, costs * psi).imag
+        undo = np.exp(1j * gamma[layer] * costs)
+        psi *= undo
+        lam *= undo
+    return grad
@@ -1,6 +1,12 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from datasource import get_data_source
+from price_cache import price_cache
+from synthetic import generate_market
+from tracing import traced
+
+MOCK_SEED = 42
 
 NIFTY_50 = {
     'RELIANCE': {'symbol': 'RELIANCE.NS', 'name': 'Reliance Industries', 'sector': 'Energy'},
@@ -61,34 +67,51 @@ def get_stock_list():
             for t, info in sorted(NIFTY_50.items())]
 
 
-def fetch_stock_data(tickers, period='2y'):
-    """Fetch stock data from Yahoo Finance with fallback to mock data."""
-    print(f"Fetching {len(tickers)} stocks from Yahoo Finance...")
+@traced('data')
+def load_closes(tickers, period='2y'):
+    """Closes of every known ticker with enough history, via the local price cache (batched
+    data-source download on miss). Returns ({ticker: Series}, stock_status); dates are not aligned yet."""
+    print(f"Fetching {len(tickers)} stocks (cache: {price_cache.directory})...")
     stock_status = {}
-    individual_data = {}
-
+    symbols = {}
     for ticker in tickers:
-        try:
-            symbol = NIFTY_50[ticker.upper()]['symbol']
-            stock_data = yf.download(symbol, period=period, progress=False, auto_adjust=True)
-            if not stock_data.empty and len(stock_data) > 50:
-                individual_data[ticker] = stock_data['Close'] if 'Close' in stock_data.columns else stock_data.iloc[:, 0]
-                stock_status[ticker] = 'available'
-                print(f"  + {ticker}: {len(stock_data)} days")
-            else:
-                stock_status[ticker] = 'data_unavailable'
-                print(f"  ! {ticker}: Insufficient data")
-        except Exception as e:
+        if ticker.upper() in NIFTY_50:
+            symbols[ticker] = NIFTY_50[ticker.upper()]['symbol']
+        else:
             stock_status[ticker] = 'data_unavailable'
-            print(f"  x {ticker}: {str(e)[:60]}")
+            print(f"  x {ticker}: unknown ticker")
+
+    source = get_data_source()
+    closes = price_cache.get_many(symbols, period, source.fetch)
+    individual_data = {}
+    for ticker in symbols:
+        series = closes.get(ticker)
+        if series is not None and len(series) > 50:
+            individual_data[ticker] = series
+            stock_status[ticker] = 'available'
+            print(f"  + {ticker}: {len(series)} days")
+        else:
+            stock_status[ticker] = 'data_unavailable'
+            print(f"  ! {ticker}: Insufficient data")
+    return individual_data, stock_status
+
 
+def price_frame(closes):
+    """Date-aligned frame of {ticker: Series} (rows with any gap dropped)."""
+    try:
+        prices = pd.DataFrame(closes)
+    except ValueError:
+        prices = pd.concat(closes, axis=1)
+        prices.columns = list(closes.keys())
+    return prices.dropna()
+
+
+def align_prices(tickers, closes, stock_status, period='2y'):
+    """Price frame for `tickers` from load_closes output (which may cover more tickers), with fallback to mock data."""
+    individual_data = {t: closes[t] for t in tickers if t in closes}
+    stock_status = {t: stock_status.get(t, 'data_unavailable') for t in tickers}
     if individual_data:
-        try:
-            prices = pd.DataFrame(individual_data)
-        except ValueError:
-            prices = pd.concat(individual_data, axis=1)
-            prices.columns = list(individual_data.keys())
-        prices = prices.dropna()
+        prices = price_frame(individual_data)
         for ticker in tickers:
             if ticker not in prices.columns and stock_status.get(ticker) == 'available':
                 stock_status[ticker] = 'data_unavailable'
@@ -102,32 +125,30 @@ def fetch_stock_data(tickers, period='2y'):
     return prices, stock_status
 
 
-def generate_mock_data(tickers, period='2y'):
-    """Generate synthetic stock data when API fails."""
-    days_map = {'1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260}
-    n_days = days_map.get(period, 504)
-    dates = pd.date_range(end=pd.Timestamp.now(), periods=n_days, freq='B')
-    mock_data = {}
+def fetch_stock_data(tickers, period='2y'):
+    """Fetch stock data via the local price cache (batched data-source download on miss) with fallback to mock data."""
+    closes, stock_status = load_closes(tickers, period)
+    return align_prices(tickers, closes, stock_status, period)
 
-    sector_params = {
-        'IT': (0.15, 0.25), 'Banking': (0.10, 0.30), 'Pharma': (0.12, 0.22),
-        'FMCG': (0.08, 0.18), 'Energy': (0.09, 0.28), 'Automobile': (0.11, 0.32),
-        'Finance': (0.13, 0.27), 'default': (0.10, 0.25)
-    }
 
-    for ticker in tickers:
-        np.random.seed(sum(ord(c) for c in ticker))
-        sector = NIFTY_50.get(ticker, {}).get('sector', 'default')
-        base_ret, base_vol = sector_params.get(sector, sector_params['default'])
-        annual_return = base_ret + np.random.uniform(-0.08, 0.12)
-        daily_return = annual_return / 252
-        daily_vol = base_vol / np.sqrt(252)
-        start_price = np.random.uniform(800, 2500)
-        mock_data[ticker] = start_price * np.exp(np.cumsum(np.random.normal(daily_return, daily_vol, n_days)))
+def generate_mock_data(tickers, period='2y'):
+    """Generate synthetic stock data when API fails.
 
-    return pd.DataFrame(mock_data, index=dates)
+    Prices come from the correlated sector factor model in synthetic.py, drawn
+    for the whole NIFTY_50 universe (plus any unknown tickers) so a ticker's
+    path does not depend on the rest of the basket.
+    """
+    days_map = {'1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260}
+    n_days = days_map.get(period, 504)
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=n_days, freq='B')
+    tickers = list(dict.fromkeys(tickers))
+    universe = list(NIFTY_50) + [t for t in tickers if t not in NIFTY_50]
+    sectors = [NIFTY_50.get(t, {}).get('sector', 'default') for t in universe]
+    prices = generate_market(sectors, n_days, seed=MOCK_SEED)
+    return pd.DataFrame(prices, index=dates, columns=universe)[tickers]
 
 
+@traced('covariance')
 def calculate_returns_and_cov(prices):
     returns = np.log(prices / prices.shift(1)).dropna()
     return returns.mean().values * 252, returns.cov().values * 252
@@ -0,0 +1,64 @@
+import numpy as np
+
+SECTOR_PARAMS = {
+    'IT': (0.15, 0.25), 'Banking': (0.10, 0.30), 'Pharma': (0.12, 0.22),
+    'FMCG': (0.08, 0.18), 'Energy': (0.09, 0.28), 'Automobile': (0.11, 0.32),
+    'Finance': (0.13, 0.27), 'default': (0.10, 0.25)
+}
+MARKET_CORRELATION = 0.3
+SECTOR_CORRELATION = 0.25
+CHUNK_ASSETS = 1024
+
+
+def synthetic_universe(n_assets, prefix='SYN'):
+    """Made-up tickers with sectors dealt round-robin from SECTOR_PARAMS, for load tests beyond NIFTY_50."""
+    names = [s for s in SECTOR_PARAMS if s != 'default']
+    width = len(str(n_assets - 1))
+    return [f"{prefix}{i:0{width}d}" for i in range(n_assets)], [names[i % len(names)] for i in range(n_assets)]
+
+
+def generate_market(sectors, n_days=504, seed=42, market_correlation=MARKET_CORRELATION,
+                    sector_correlation=SECTOR_CORRELATION, path=None, dtype=np.float64, chunk_assets=CHUNK_ASSETS):
+    """Daily closes (n_days x assets) from a market + sector factor model, one asset per entry of `sectors`.
+
+    Each asset's daily log return is drift + vol * (sqrt(rho_m) M + sqrt(rho_s) S_sector
+    + sqrt(1 - rho_m - rho_s) e), so assets correlate at rho_m, or rho_m + rho_s
+    inside a sector, while keeping the SECTOR_PARAMS volatility (unknown sectors
+    use 'default' parameters but still get their own factor). Independent seed
+    streams for parameters, factors and noise are drawn asset-major, so an
+    asset's path depends only on `seed`, its position and the sectors before it,
+    not on chunking or on assets appended later. With `path` the prices are
+    written to a .npy memmap (open_memmap) chunk by chunk and that is returned.
+    """
+    if market_correlation < 0 or sector_correlation < 0 or market_correlation + sector_correlation > 1:
+        raise ValueError("market_correlation and sector_correlation must be >= 0 and sum to at most 1")
+    n = len(sectors)
+    index = {}
+    sector_of = np.fromiter((index.setdefault(s, len(index)) for s in sectors), dtype=np.int64, count=n)
+    names = list(index)
+    base = np.array([SECTOR_PARAMS.get(s, SECTOR_PARAMS['default']) for s in names])
+
+    param_seq, factor_seq, noise_seq = np.random.SeedSequence(seed).spawn(3)
+    param_rng, noise_rng = np.random.default_rng(param_seq), np.random.default_rng(noise_seq)
+    factors = np.random.default_rng(factor_seq).standard_normal((1 + len(names), n_days)).T
+    systematic = (np.sqrt(market_correlation) * factors[:, :1]
+                  + np.sqrt(sector_correlation) * factors[:, 1:])
+    idio = np.sqrt(1 - market_correlation - sector_correlation)
+
+    if path is not None:
+        prices = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_days, n))
+    else:
+        prices = np.empty((n_days, n), dtype=dtype)
+    for a in range(0, n, chunk_assets):
+        b = min(a + chunk_assets, n)
+        s = sector_of[a:b]
+        u = param_rng.uniform(size=(b - a, 2))
+        annual_return = base[s, 0] - 0.08 + 0.20 * u[:, 0]
+        daily_vol = base[s, 1] / np.sqrt(252)
+        start_price = 800 + 1700 * u[:, 1]
+        shocks = systematic[:, s] + idio * noise_rng.standard_normal((b - a, n_days)).T
+        log_prices = np.log(start_price) + np.cumsum(annual_return / 252 + daily_vol * shocks, axis=0)
+        prices[:, a:b] = np.exp(log_prices)
+    if path is not None:
+        prices.flush()
+    return prices
@@ -0,0 +1,171 @@
+import io
+import time
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILERS = ('cprofile', 'pyinstrument')
+PROFILE_LINES = 40
+
+_current = contextvars.ContextVar('trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus data model, one series per label tuple."""
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.setdefault(label_values, [[0] * len(self.buckets), 0, 0.0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (buckets, count, total) in sorted(self._series.items()):
+            labels = ','.join(f'{k}="{v}"' for k, v in zip(self.labels, values))
+            for bound, n in zip(self.buckets, buckets):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {n}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Metrics:
+    """Process-wide request/stage latency histograms and event counters for /metrics."""
+
+    def __init__(self):
+        self.requests = Histogram('qpo_request_duration_seconds', 'HTTP request latency.',
+                                  ('method', 'path', 'status'))
+        self.stages = Histogram('qpo_stage_duration_seconds', 'Pipeline stage latency.', ('stage',))
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, method, path, status, seconds):
+        with self._lock:
+            self.requests.observe((method, path, str(status)), seconds)
+
+    def observe_stage(self, stage, seconds):
+        with self._lock:
+            self.stages.observe((stage,), seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_report(self, report):
+        """Fold in a trace report produced in another process (e.g. a job worker), one mean-duration sample per call."""
+        with self._lock:
+            for stage, entry in report.get('stages', {}).items():
+                for _ in range(entry['count']):
+                    self.stages.observe((stage,), entry['seconds'] / entry['count'])
+            for name, value in report.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def render(self):
+        with self._lock:
+            lines = self.requests.render() + self.stages.render()
+            lines += ["# HELP qpo_events_total Work counted by the pipeline (circuits, shots, evaluations).",
+                      "# TYPE qpo_events_total counter"]
+            lines += [f'qpo_events_total{{event="{name}"}} {value}' for name, value in sorted(self.counters.items())]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class Trace:
+    """Per-request stage durations and counters, collected while the trace is active.
+
+    Activate with `with Trace(profile=...) as trace:`; stage() and count()
+    calls in the same context (thread or task) land here and in `metrics`.
+    `profile` ('cprofile' or 'pyinstrument') captures a profile of the block.
+    """
+
+    def __init__(self, profile=None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profile}'. Use one of: {', '.join(PROFILERS)}")
+        self.profile = profile
+        self.stages, self.counters = {}, {}
+        self.profile_text = None
+        self._token = self._profiler = None
+        self._start = self.seconds = 0.0
+
+    def __enter__(self):
+        if self.profile == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        elif self.profile == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        _current.reset(self._token)
+        if self.profile == 'pyinstrument':
+            self._profiler.stop()
+            self.profile_text = self._profiler.output_text()
+        elif self.profile == 'cprofile':
+            import pstats
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            self.profile_text = out.getvalue()
+        return False
+
+    def add(self, stage, seconds):
+        entry = self.stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+        entry['count'] += 1
+        entry['seconds'] += seconds
+
+    def report(self):
+        report = {'total_seconds': self.seconds, 'stages': self.stages, 'counters': self.counters}
+        if self.profile_text is not None:
+            report['profile'] = {'profiler': self.profile, 'text': self.profile_text}
+        return report
+
+
+@contextmanager
+def stage(name):
+    """Time a block as pipeline stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, seconds)
+        metrics.observe_stage(name, seconds)
+
+
+def traced(name):
+    """Decorator form of stage()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """Add `value` to counter `name` (circuits built, shots sampled, objective evaluations, ...)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + value
+    metrics.increment(name, value)
@@ -0,0 +1,146 @@
+import os
+import json
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+STORE_PATH = Path(os.environ.get('QPO_ANGLE_STORE', Path(__file__).parent / '.cache' / 'qaoa_angles.json'))
+WARM_RHOBEG = 0.1
+
+
+def problem_features(Q, k, lambda_param, p, mixer='x'):
+    """Coarse description of a QAOA instance used to match stored angles.
+
+    `scale` is the typical off-diagonal QUBO coupling, which the cardinality
+    penalty dominates; phase angles are stored multiplied by it so they
+    transfer between problems whose energy scales differ.
+    """
+    n = Q.shape[0]
+    upper = np.abs(Q[np.triu_indices(n, 1)]) if n > 1 else np.abs(np.diag(Q))
+    scale = float(np.median(upper)) if upper.size and np.median(upper) > 0 else 1.0
+    return {'n': n, 'k': k, 'p': p, 'mixer': mixer, 'lambda': float(lambda_param), 'scale': scale}
+
+
+def interpolate_angles(gamma, beta):
+    """INTERP: angles for depth p + 1 from an optimized depth-p schedule (Zhou et al., PRX 2020)."""
+    def stretch(angles):
+        p = len(angles)
+        padded = np.concatenate([[0.0], angles, [0.0]])
+        i = np.arange(1, p + 2)
+        return (i - 1) / p * padded[i - 1] + (p - i + 1) / p * padded[i]
+    return stretch(np.asarray(gamma, dtype=float)), stretch(np.asarray(beta, dtype=float))
+
+
+def _key(features):
+    return (f"{features['mixer']}|n={features['n']}|k={features['k']}|p={features['p']}"
+            f"|lambda={features['lambda']:.2f}|scale={np.log10(features['scale']):.1f}")
+
+
+def _distance(a, b):
+    return (abs(a['n'] - b['n']) / max(a['n'], b['n']) + abs(a['k'] / a['n'] - b['k'] / b['n'])
+            + abs(a['lambda'] - b['lambda']) + abs(np.log10(a['scale'] / b['scale'])))
+
+
+class AngleStore:
+    """Persistent (gamma, beta) store for warm-starting QAOA.
+
+    Entries live in one JSON file keyed by rounded problem features; the latest
+    optimized angles for a key replace the previous ones. The file is re-read
+    when another process (e.g. a job worker) has rewritten it; writers merge
+    under an exclusive lock on a sidecar .lock file and swap in a uniquely
+    named temporary file, so concurrent processes never lose each other's entries.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.hits = self.interpolated = self.misses = 0
+        self._entries, self._mtime = {}, None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix('.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _refresh(self, force=False):
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if force or mtime != self._mtime:
+            try:
+                self._entries = json.loads(self.path.read_text())
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+
+    def _nearest(self, features, p):
+        candidates = [e for e in self._entries.values()
+                      if e['features']['p'] == p and e['features']['mixer'] == features['mixer']]
+        return min(candidates, key=lambda e: _distance(features, e['features']), default=None)
+
+    def lookup(self, features):
+        """Initial (gamma, beta, entry) for `features`, or None.
+
+        The nearest entry at the same depth wins; otherwise the deepest
+        shallower schedule is extended with INTERP one layer at a time.
+        """
+        p = features['p']
+        with self._lock:
+            self._refresh()
+            entry = self._nearest(features, p)
+            source_p = p
+            while entry is None and source_p > 1:
+                source_p -= 1
+                entry = self._nearest(features, source_p)
+            if entry is None:
+                self.misses += 1
+                return None
+            if source_p == p:
+                self.hits += 1
+            else:
+                self.interpolated += 1
+
+        gamma = np.asarray(entry['gamma']) / features['scale']
+        beta = np.asarray(entry['beta'])
+        for _ in range(p - source_p):
+            gamma, beta = interpolate_angles(gamma, beta)
+        return gamma, beta, {'key': _key(entry['features']), 'p': source_p,
+                             'cold_iterations': entry['cold_iterations']}
+
+    def record(self, features, gamma, beta, energy, cold_iterations):
+        """Save optimized angles; `cold_iterations` is what a random start needed for this kind of problem."""
+        entry = {'features': features, 'gamma': [float(g) * features['scale'] for g in gamma],
+                 'beta': [float(b) for b in beta], 'energy': float(energy),
+                 'cold_iterations': int(cold_iterations)}
+        try:
+            with self._lock, self._file_lock():
+                self._refresh(force=True)
+                self._entries[_key(features)] = entry
+                with tempfile.NamedTemporaryFile('w', dir=self.path.parent, prefix=self.path.name, suffix='.tmp',
+                                                 delete=False) as f:
+                    json.dump(self._entries, f)
+                os.replace(f.name, self.path)
+                self._mtime = self.path.stat().st_mtime
+        except OSError as e:
+            # Warm starts are an optimization; a store that cannot be written must not fail the solve
+            print(f"  ! Could not save QAOA angles to {self.path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            return {'path': str(self.path), 'entries': len(self._entries), 'hits': self.hits,
+                    'interpolated': self.interpolated, 'misses': self.misses}
+
+
+angle_store = AngleStore()
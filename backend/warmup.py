@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import threading
+
+from stocks import NIFTY_50, generate_mock_data
+from memo import cached_returns_and_cov
+from qaoa import build_qubo_matrix, qubo_to_ising, qaoa_ansatz, optimize_qaoa
+
+WARMUP = os.environ.get('QPO_WARMUP', '1') != '0'
+WARM_QUBITS = (4, 6, 8, 10, 12)
+WARM_LAYERS = (1, 2)
+
+
+def preload():
+    """Import the solver dependencies that qaoa and optimizers only load on first use (Qiskit, SciPy)."""
+    import scipy.optimize
+    import qiskit.primitives
+    import qiskit.circuit.library
+    import qiskit.compiler
+
+
+class Readiness:
+    """Startup warm-up and its outcome, as reported by /ready and /health.
+
+    load() imports the solver stack; run() then preloads the mock-universe
+    covariance, compiles the x-mixer circuit templates for WARM_QUBITS x
+    WARM_LAYERS (QUBOs are dense, so every basket of that size reuses them),
+    runs one tiny QAOA solve and starts the job workers. A failed step leaves
+    the process 'degraded' but ready: requests then just pay the cold start.
+    """
+
+    def __init__(self):
+        self.status = 'starting'
+        self.steps = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.status in ('ready', 'degraded', 'skipped')
+
+    def _step(self, name, fn):
+        start = time.perf_counter()
+        try:
+            detail = fn()
+            entry = {'status': 'ok', **(detail or {})}
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+            entry = {'status': 'failed', 'error': str(e)}
+        entry['seconds'] = round(time.perf_counter() - start, 4)
+        with self._lock:
+            self.steps[name] = entry
+        return entry['status'] == 'ok'
+
+    def load(self):
+        """Import Qiskit and SciPy. Call this on the main thread (uvicorn runs the lifespan there):
+        Qiskit's compiled extension crashes if it was first imported on a thread that has since exited."""
+        self._step('imports', preload)
+
+    def run(self, job_manager=None):
+        if not WARMUP:
+            self.status = 'skipped'
+            return
+        self.status = 'warming'
+        problem = {}
+
+        def data():
+            prices = generate_mock_data(list(NIFTY_50))
+            problem['returns'], problem['covariance'], _ = cached_returns_and_cov(prices)
+            return {'assets': len(prices.columns)}
+
+        def circuits():
+            for n in WARM_QUBITS:
+                Q = build_qubo_matrix(problem['returns'][:n], problem['covariance'][:n, :n], n // 2)
+                h, J, _ = qubo_to_ising(Q)
+                for p in WARM_LAYERS:
+                    qaoa_ansatz(h, J, n, p)
+            return {'templates': len(WARM_QUBITS) * len(WARM_LAYERS)}
+
+        def solver():
+            optimize_qaoa(problem['returns'][:4], problem['covariance'][:4, :4], 2, maxiter=5, shots=64,
+                          warm_start=False)
+
+        ok = self.steps.get('imports', {}).get('status') == 'ok'
+        ok = self._step('data', data) and ok
+        if 'returns' in problem:
+            ok = self._step('circuits', circuits) and ok
+            ok = self._step('solver', solver) and ok
+        if job_manager is not None:
+            ok = self._step('workers', lambda: {'processes': job_manager.start(initializer=preload)}) and ok
+        self.status = 'ready' if ok else 'degraded'
+        print(f"Warm-up {self.status} after {time.time() - self.started_at:.2f}s")
+
+    def report(self):
+        with self._lock:
+            return {'status': self.status, 'ready': self.ready, 'steps': dict(self.steps),
+                    'uptime_seconds': round(time.time() - self.started_at, 1),
+                    'quantum_ready': 'qiskit' in sys.modules}
+
+
+readiness = Readiness()
@@ -11,7 +11,7 @@ const CONFIG = {
 const state = {
     stocks: [], selectedStocks: new Set(),
     portfolioSize: CONFIG.DEFAULT_K, riskAversion: CONFIG.DEFAULT_LAMBDA,
-    isLoading: false, results: null
+    isLoading: false, results: null, jobId: null
 };
 
 // DOM refs
@@ -27,6 +27,8 @@ const elements = {
     maxIterations: document.getElementById('maxIterations'),
     shots: document.getElementById('shots'),
     optimizeBtn: document.getElementById('optimizeBtn'),
+    stopBtn: document.getElementById('stopBtn'),
+    progressText: document.getElementById('progressText'),
     resultsPanel: document.getElementById('resultsPanel'),
     errorToast: document.getElementById('errorToast'),
     errorMessage: document.getElementById('errorMessage'),
@@ -67,6 +69,7 @@ function setupEventListeners() {
     elements.selectAllBtn.addEventListener('click', selectAllStocks);
     elements.clearAllBtn.addEventListener('click', clearAllStocks);
     elements.optimizeBtn.addEventListener('click', optimizePortfolio);
+    elements.stopBtn.addEventListener('click', stopOptimization);
 }
 
 async function loadStocks() {
@@ -149,7 +152,7 @@ async function optimizePortfolio() {
             max_per_sector: parseInt(elements.maxPerSector.value)
         };
 
-        const response = await fetch(`${CONFIG.API_URL}/api/optimize`, {
+        const response = await fetch(`${CONFIG.API_URL}/api/jobs`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(requestBody)
@@ -160,17 +163,56 @@ async function optimizePortfolio() {
             throw new Error(errorData.detail || 'Optimization failed');
         }
 
-        const result = await response.json();
+        const { job_id } = await response.json();
+        state.jobId = job_id;
+        const result = await streamJob(job_id);
         state.results = result;
         displayResults(result);
     } catch (error) {
         console.error('Optimization error:', error);
         showError(`Optimization failed: ${error.message}`);
     } finally {
+        state.jobId = null;
         setLoadingState(false);
     }
 }
 
+// Follow a background job over Server-Sent Events until it produces a result
+function streamJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${CONFIG.API_URL}/api/jobs/${jobId}/events`);
+        source.addEventListener('progress', e => showProgress(JSON.parse(e.data)));
+        source.addEventListener('result', e => { source.close(); resolve(JSON.parse(e.data)); });
+        source.addEventListener('cancelled', () => { source.close(); reject(new Error('Optimization was cancelled')); });
+        source.addEventListener('error', e => {
+            source.close();
+            reject(new Error(e.data ? JSON.parse(e.data).error : 'Lost connection to the progress stream'));
+        });
+    });
+}
+
+function showProgress(event) {
+    if (event.stage === 'brute_force') {
+        elements.progressText.textContent = `Classical search: ${event.evaluated.toLocaleString()} / ${event.total.toLocaleString()}`;
+    } else if (event.stage === 'heuristic') {
+        elements.progressText.textContent = `Classical heuristic (${event.method}) · best = ${event.best_cost.toFixed(3)}`;
+    } else if (event.stage === 'branch_and_bound') {
+        elements.progressText.textContent = `Classical branch-and-bound: ${event.nodes.toLocaleString()} nodes`;
+    } else if (event.stage === 'qaoa' && event.energy === undefined) {
+        elements.progressText.textContent = `QAOA: running ${event.starts} starts`;
+        elements.stopBtn.style.display = 'block';
+    } else if (event.stage === 'qaoa') {
+        elements.progressText.textContent = `QAOA iteration ${event.iteration}/${event.maxiter} · E = ${event.energy.toFixed(3)}`;
+        elements.stopBtn.style.display = 'block';
+    }
+}
+
+async function stopOptimization() {
+    if (!state.jobId) return;
+    elements.stopBtn.disabled = true;
+    await fetch(`${CONFIG.API_URL}/api/jobs/${state.jobId}/stop`, { method: 'POST' });
+}
+
 function displayResults(result) {
     elements.resultsPanel.style.display = 'block';
     elements.resultsPanel.scrollIntoView({ behavior: 'smooth', block: 'start' });
@@ -261,7 +303,9 @@ function displayResults(result) {
         document.getElementById('classicalSharpe').textContent = comp.classical.sharpe_ratio.toFixed(3);
         document.getElementById('classicalCost').textContent = comp.classical.optimal_cost.toFixed(4);
         document.getElementById('classicalTime').textContent = `${comp.classical.computation_time.toFixed(4)}s`;
-        document.getElementById('classicalMethod').textContent = `Evaluated ${comp.classical.combinations_evaluated} combinations`;
+        document.getElementById('classicalMethod').textContent = comp.classical.solver === 'branch_and_bound'
+            ? `Branch-and-bound: ${comp.classical.nodes_explored.toLocaleString()} nodes of ${comp.classical.total_combinations.toLocaleString()} combinations${comp.classical.proven_optimal ? '' : ' (time limit hit, not proven optimal)'}`
+            : `Evaluated ${comp.classical.combinations_evaluated} combinations`;
 
         // QAOA column
         document.getElementById('qaoaStocks').textContent = comp.qaoa.selected_stocks.join(', ');
@@ -283,6 +327,9 @@ function setLoadingState(loading) {
     btnIcon.style.display = loading ? 'none' : 'inline';
     btnLoading.style.display = loading ? 'flex' : 'none';
     elements.optimizeBtn.disabled = loading;
+    elements.progressText.textContent = 'Running QAOA...';
+    elements.stopBtn.style.display = 'none';
+    elements.stopBtn.disabled = false;
 }
 
 function showStockLoading() {